@@ -1,7 +1,8 @@
 import os
 import re
 import h5py 
-from collections import OrderedDict
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 def read_h5_file(filename, tags=None):
     """ Read data for 
@@ -9,13 +10,19 @@ def read_h5_file(filename, tags=None):
     Args:
         filenane (str): directory containing all data files
     Returns:
-        OrderedDict   : dictionary containing all entries of the hdf5 file
+        dict          : dictionary containing all entries of the hdf5 file
     """
     data = dict()
 
+    def read_raw(node):
+        # read the full dataset into a preallocated buffer
+        raw = np.empty(node.shape, dtype=node.dtype)
+        node.read_direct(raw)
+        return raw
+
     def read_node(node):
         name = node.name[1:]
-        dtype = node[:].dtype
+        dtype = node.dtype
 
         # Parsing a complex number
         if len(dtype) == 2:
@@ -27,7 +34,15 @@ def read_h5_file(filename, tags=None):
                (rname == "r" and iname == "i"):
 
                 if (rtype == itype):
-                    return node[:][rname] + 1j*node[:][iname]   
+                    raw = read_raw(node)
+                    ftype = dtype[0]
+                    ctype = {4: np.complex64, 8: np.complex128}.get(ftype.itemsize)
+                    if ftype.kind == "f" and ftype.isnative and ctype is not None and \
+                       dtype.itemsize == 2 * ftype.itemsize and \
+                       dtype.fields[iname][1] == ftype.itemsize:
+                        # real and imaginary parts are contiguous, reinterpret as complex
+                        return raw.view(ctype)
+                    return raw[rname] + 1j*raw[iname]
                 else:
                     raise TypeError("Malformed complex numbers: "
                                     "real and imaginary datatypes do not agree")
@@ -36,7 +51,7 @@ def read_h5_file(filename, tags=None):
                                 "real and imaginary part not properly named")
         # Plain data
         elif len(dtype) == 0:
-            return node[:]
+            return read_raw(node)
         else:
             raise TypeError("Invalid type of dataspace")
                 
@@ -45,7 +60,10 @@ def read_h5_file(filename, tags=None):
         def visitor(name, node):
             name = node.name[1:]
             if isinstance(node, h5py.Dataset):
-                data[name] = read_node(node)
+                if node.size == 0 and len(node.dtype) == 0:
+                    data[name] = np.empty(node.shape, dtype=node.dtype)
+                else:
+                    data[name] = read_node(node)
         with h5py.File(filename, 'r') as fl:
             fl.visititems(visitor)
 
@@ -58,35 +76,38 @@ def read_h5_file(filename, tags=None):
             for tag in tags:
                 node = fl[tag]
                 if isinstance(node, h5py.Dataset):
-                    data[tag] = read_node(fl[tag])
+                    data[tag] = read_node(node)
                 else:
                     raise ValueError("Invalid tag name: node \"{}\" not found in hdf5 file".format(tag))
         
-    return OrderedDict(sorted(data.items()))
+    return dict(sorted(data.items()))
    
 
-def read_h5_data(directory, regex, tags=None):
+def read_h5_data(directory, regex, tags=None, max_workers=None):
     """ Read data in a directory given as hdf5 files of a certain regular expression
+
+    The files are read concurrently by a pool of threads.
         
     Args:
         directory (str)   : directory containing all data files
         regex (str)       : regular expression to match files in the directory
+        tags (list of str): (optional) only read the specified tags of every file
+        max_workers (int) : (optional) maximal number of threads reading files
     Returns:
-        OrderedDict : ordered dictionary, keys are tuples of parameters, values are
-                      dictionaries containing the hdf5 data
+        dict : dictionary sorted by keys, keys are tuples of parameters, values are
+               dictionaries containing the hdf5 data
     """
-    data = dict()
+    files = dict()
     for (dirname, _, filenames) in os.walk(directory):
         for fl in filenames:
             match = re.search(regex, fl)
             if match:
                 group = match.groups()
-                filename = os.path.join(dirname, fl)
-                data[group] = read_h5_file(filename, tags=tags)
-
-    return OrderedDict(sorted(data.items()))
+                files[group] = os.path.join(dirname, fl)
 
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict((group, executor.submit(read_h5_file, filename, tags=tags))
+                       for group, filename in files.items())
+        data = dict((group, future.result()) for group, future in futures.items())
 
-            
-    
-            
+    return dict(sorted(data.items()))
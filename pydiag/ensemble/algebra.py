@@ -1,12 +1,171 @@
 from .ensemble import Ensemble
-from .array import Array
+from .array import Array, _group_blocks, _stack, _from_groups, _array_module
 from .scalar import Scalar
 
+import string
+import functools
 import numpy as np
-import scipy as sp
+import scipy.linalg
+
+
+# maximal number of entries of a single operand for which einsum
+# contracts blocks of equal shape in one batched call
+_EINSUM_BATCH_SIZE = 4096
+
+# coefficients of the diagonal Pade approximants of the matrix exponential
+# and the maximal 1-norms up to which they are accurate in double precision,
+# see N. J. Higham, SIAM J. Matrix Anal. Appl. 26, 1179 (2005)
+_PADE_COEFFICIENTS = {
+    3: (120., 60., 12., 1.),
+    5: (30240., 15120., 3360., 420., 30., 1.),
+    7: (17297280., 8648640., 1995840., 277200., 25200., 1512., 56., 1.),
+    9: (17643225600., 8821612800., 2075673600., 302702400., 30270240.,
+        2162160., 110880., 3960., 90., 1.),
+    13: (64764752532480000., 32382376266240000., 7771770303897600.,
+         1187353796428800., 129060195264000., 10559470521600.,
+         670442572800., 33522128640., 1323241920., 40840800., 960960.,
+         16380., 182., 1.)
+}
+_PADE_THETA = {3: 1.495585217958292e-2,
+               5: 2.539398330063230e-1,
+               7: 9.504178996162932e-1,
+               9: 2.097847961257068e0,
+               13: 5.371920351148152e0}
+
+# maximal dimension of matrices exponentiated by the batched Pade
+# approximant, beyond which scipy.linalg.expm on the stack is faster
+_PADE_MAX_DIM = 12
+
+def _expm_pade(A, A2, m):
+    """ Numerator and denominator of the degree m Pade approximant, R = (V-U)^-1 (V+U)
+
+    Args:
+         A (np.ndarray)  : stacked square matrices (B, n, n)
+         A2 (np.ndarray) : stacked squares of A
+         m (int)         : degree of the Pade approximant
+    Returns:
+         np.ndarray, np.ndarray : odd part U and even part V
+    """
+    b = _PADE_COEFFICIENTS[m]
+    ident = _array_module(A).eye(A.shape[-1], dtype=A.dtype)
+    if m == 13:
+        A4 = A2 @ A2
+        A6 = A4 @ A2
+        U = A @ (A6 @ (b[13]*A6 + b[11]*A4 + b[9]*A2) +
+                 b[7]*A6 + b[5]*A4 + b[3]*A2 + b[1]*ident)
+        V = A6 @ (b[12]*A6 + b[10]*A4 + b[8]*A2) + \
+            b[6]*A6 + b[4]*A4 + b[2]*A2 + b[0]*ident
+    else:
+        U = b[1] * ident + b[3] * A2
+        V = b[0] * ident + b[2] * A2
+        A2k = A2
+        for k in range(2, (m + 1) // 2):
+            A2k = A2k @ A2
+            U = U + b[2*k+1] * A2k
+            V = V + b[2*k] * A2k
+        U = A @ U
+    return U, V
+
+def _expm_scipy(A):
+    """ Matrix exponential of stacked matrices by scipy.linalg.expm
+
+    scipy implements the scaling and squaring algorithm of A. H. Al-Mohy and
+    N. J. Higham, SIAM J. Matrix Anal. Appl. 31, 970 (2009), whose choice of
+    the number of squarings avoids overscaling of non-normal matrices with
+    large norm. cupy arrays are exponentiated on the host.
+
+    Args:
+         A (np.ndarray) : stacked square matrices of shape (B, n, n)
+    Returns:
+         np.ndarray : the matrix exponentials of shape (B, n, n)
+    """
+    xp = _array_module(A)
+    if xp is np:
+        return scipy.linalg.expm(A)
+    return xp.asarray(scipy.linalg.expm(xp.asnumpy(A)))
+
+def _expm_unscaled_pade(A):
+    """ Matrix exponential of stacked matrices by Pade approximation
+
+    Matrices whose 1-norm is small enough not to require scaling are
+    exponentiated by a single Pade approximant evaluated on the whole stack,
+    whose degree is chosen from the largest 1-norm. Matrices which require
+    scaling and squaring are passed to scipy.linalg.expm.
+
+    Args:
+         A (np.ndarray) : stacked square matrices of shape (B, n, n)
+    Returns:
+         np.ndarray : the matrix exponentials of shape (B, n, n)
+    """
+    xp = _array_module(A)
+    norms = xp.linalg.norm(A, 1, axis=(-2, -1))
+    unscaled = norms <= _PADE_THETA[13]
+    if not bool(unscaled.any()):
+        return _expm_scipy(A)
+
+    R = xp.empty_like(A)
+    A_unscaled = A[unscaled]
+    A2 = A_unscaled @ A_unscaled
+    max_norm = float(norms[unscaled].max())
+    for m, theta in _PADE_THETA.items():
+        if max_norm <= theta:
+            U, V = _expm_pade(A_unscaled, A2, m)
+            R[unscaled] = xp.linalg.solve(V - U, V + U)
+            break
+    if not bool(unscaled.all()):
+        scaled = ~unscaled
+        R[scaled] = _expm_scipy(A[scaled])
+    return R
+
+def _expm_batched(A):
+    """ Matrix exponential of stacked matrices
+
+    Diagonal matrices are exponentiated entrywise on their diagonal.
+    Triangular matrices are passed to scipy.linalg.expm, which treats them
+    accurately even for large norms. All other matrices are exponentiated by
+    a batched Pade approximant up to dimension _PADE_MAX_DIM, and by
+    scipy.linalg.expm otherwise.
+
+    Args:
+         A (np.ndarray) : stacked square matrices of shape (..., n, n), may
+                          also be a cupy.ndarray
+    Returns:
+         np.ndarray : the matrix exponentials with the same shape as A
+    """
+    xp = _array_module(A)
+    if A.ndim < 2 or A.shape[-1] != A.shape[-2]:
+        raise ValueError("expected square matrices in the last two dimensions")
+    if not np.issubdtype(A.dtype, np.inexact):
+        A = A.astype(float)
+
+    shape = A.shape
+    n = shape[-1]
+    if A.size == 0:
+        return xp.empty(shape, dtype=A.dtype)
+    if n == 1:
+        return xp.exp(A)
+
+    A = A.reshape((-1, n, n))
+    lower = ~xp.any(xp.triu(A, 1) != 0, axis=(-2, -1))
+    upper = ~xp.any(xp.tril(A, -1) != 0, axis=(-2, -1))
+    diagonal = lower & upper
+    triangular = (lower | upper) & ~diagonal
+    full = ~(lower | upper)
+    expm_full = _expm_unscaled_pade if n <= _PADE_MAX_DIM else _expm_scipy
+    if bool(full.all()):
+        return expm_full(A).reshape(shape)
+
+    R = xp.zeros_like(A)
+    if bool(diagonal.any()):
+        mats = xp.flatnonzero(diagonal)[:, np.newaxis]
+        idx = xp.arange(n)
+        R[mats, idx, idx] = xp.exp(A[mats, idx, idx])
+    if bool(triangular.any()):
+        R[triangular] = _expm_scipy(A[triangular])
+    if bool(full.any()):
+        R[full] = expm_full(A[full])
+    return R.reshape(shape)
 
-from collections import OrderedDict
-    
 def expm(A):
     """ Compute the matrix exponential of an ensemble.Array
 
@@ -16,10 +175,10 @@ def expm(A):
          ensemble.Array : the resulting matrix exponential with the same shape of A
     """
     if isinstance(A, Array):
-        data = OrderedDict()
-        for block, arr in A.items():
-            data[block] = sp.linalg.expm(arr)
-        return Array(A.ensemble, data)
+        results = []
+        for blocks in _group_blocks(A).values():
+            results.append((blocks, _expm_batched(_stack(A, blocks))))
+        return _from_groups(A.ensemble, results)
     else:
         raise TypeError("input needs to be an ensemble.Array")
 
@@ -32,7 +191,7 @@ def exp(A):
          ensemble.Array : the resulting component-wise exponential with the same shape of A
     """
     if isinstance(A, Array):
-        data = OrderedDict()
+        data = dict()
         for block, arr in A.items():
             data[block] = np.exp(arr)
         return Array(A.ensemble, data)
@@ -69,7 +228,7 @@ def transpose(A):
          ensemble.Array : A with its axes permuted.
     """
     if isinstance(A, Array):
-        data = OrderedDict()
+        data = dict()
         for block, arr in A.items():
             data[block] = np.transpose(arr)
         return Array(A.ensemble, data)
@@ -85,7 +244,7 @@ def abs(A):
          Array : absolute values of A
     """
     if isinstance(A, Array):
-        data = OrderedDict()
+        data = dict()
         for block, arr in A.items():
             data[block] = np.abs(arr)
         return Array(A.ensemble, data)
@@ -102,7 +261,7 @@ def conj(A):
          Array : complex conjugate of A
     """
     if isinstance(A, Array):
-        data = OrderedDict()
+        data = dict()
         for block, arr in A.items():
             data[block] = np.conj(arr)
         return Array(A.ensemble, data)
@@ -120,16 +279,58 @@ def dot(a, b):
          ensemble.Array : dot product of all blocks
     """
     if isinstance(a, Array) and isinstance(b, Array):
-        data = OrderedDict()
         if a.ensemble != b.ensemble:
             raise ValueError("a and b do not share the same ensemble")
 
-        for block, deg in a.ensemble:
-            data[block] = np.dot(a.array[block], b.array[block])
-        return Array(a.ensemble, data)
+        a_arr = a.array
+        b_arr = b.array
+        results = []
+        for ((shape_a, _), (shape_b, _)), blocks in _group_blocks(a, b).items():
+            if len(shape_a) > 2 or len(shape_b) > 2 or \
+               len(shape_a) == 0 or len(shape_b) == 0:
+                results.append((blocks, [np.dot(a_arr[block], b_arr[block])
+                                         for block in blocks]))
+                continue
+
+            sa = _stack(a, blocks)
+            sb = _stack(b, blocks)
+            if len(shape_a) == 2 and len(shape_b) == 2:
+                results.append((blocks, np.matmul(sa, sb)))
+            elif len(shape_a) == 2 and len(shape_b) == 1:
+                results.append((blocks, np.matmul(sa, sb[..., np.newaxis])[..., 0]))
+            elif len(shape_a) == 1 and len(shape_b) == 2:
+                results.append((blocks, np.matmul(sa[:, np.newaxis, :], sb)[:, 0, :]))
+            else:
+                results.append((blocks, np.einsum("bi,bi->b", sa, sb)))
+        return _from_groups(a.ensemble, results)
     else:
         raise TypeError("inputs need to be ensemble.Array")
 
+def _outer_batched(op, a, b, flatten=False):
+    """ Outer operation of two ensemble.Arrays on stacked groups of blocks
+
+    Args:
+         op (np.ufunc)      : binary operation, e.g. np.multiply or np.add
+         a (ensemble.Array) : First array
+         b (ensemble.Array) : Second array
+         flatten (bool)     : flag whether inputs are flattened as in numpy.outer
+    Returns:
+         ensemble.Array : outer operation of all blocks
+    """
+    if a.ensemble != b.ensemble:
+        raise ValueError("a and b do not share the same ensemble")
+
+    results = []
+    for ((shape_a, _), (shape_b, _)), blocks in _group_blocks(a, b).items():
+        if flatten:
+            shape_a = (int(np.prod(shape_a)),)
+            shape_b = (int(np.prod(shape_b)),)
+        nblocks = (len(blocks),)
+        sa = _stack(a, blocks).reshape(nblocks + shape_a + (1,) * len(shape_b))
+        sb = _stack(b, blocks).reshape(nblocks + (1,) * len(shape_a) + shape_b)
+        results.append((blocks, op(sa, sb)))
+    return _from_groups(a.ensemble, results)
+
 def outer(a, b):
     """ outer product of two ensemble.Arrays as defined by numpy.outer
 
@@ -140,13 +341,7 @@ def outer(a, b):
          ensemble.Array : outer product of all blocks
     """
     if isinstance(a, Array) and isinstance(b, Array):
-        data = OrderedDict()
-        if a.ensemble != b.ensemble:
-            raise ValueError("a and b do not share the same ensemble")
-
-        for block, deg in a.ensemble:
-            data[block] = np.outer(a.array[block], b.array[block])
-        return Array(a.ensemble, data)
+        return _outer_batched(np.multiply, a, b, flatten=True)
     else:
         raise TypeError("inputs need to be ensemble.Array")
 
@@ -160,13 +355,7 @@ def add_outer(a, b):
          ensemble.Array : outer addition of all blocks
     """
     if isinstance(a, Array) and isinstance(b, Array):
-        data = OrderedDict()
-        if a.ensemble != b.ensemble:
-            raise ValueError("a and b do not share the same ensemble")
-
-        for block, deg in a.ensemble:
-            data[block] = np.add.outer(a.array[block], b.array[block])
-        return Array(a.ensemble, data)
+        return _outer_batched(np.add, a, b)
     else:
         raise TypeError("inputs need to be ensemble.Array")
 
@@ -180,26 +369,63 @@ def subtract_outer(a, b):
          ensemble.Array : outer subtraction of all blocks
     """
     if isinstance(a, Array) and isinstance(b, Array):
-        data = OrderedDict()
-        if a.ensemble != b.ensemble:
-            raise ValueError("a and b do not share the same ensemble")
-
-        for block, deg in a.ensemble:
-            data[block] = np.subtract.outer(a.array[block], b.array[block])
-        return Array(a.ensemble, data)
+        return _outer_batched(np.subtract, a, b)
     else:
         raise TypeError("inputs need to be ensemble.Array")
 
-    
-    
-def einsum(subscripts, *operands, optimize=False):
+def _batched_subscripts(subscripts):
+    """ Prepend an unused batch label to every term of einsum subscripts
+
+    Args:
+         subscripts (str) : subscripts as in numpy.einsum
+    Returns:
+         str : explicit subscripts with a leading batch axis, None if not possible
+    """
+    subscripts = subscripts.replace(" ", "")
+    if "." in subscripts:
+        return None
+
+    if "->" in subscripts:
+        inputs, output = subscripts.split("->")
+    else:
+        inputs = subscripts
+        labels = inputs.replace(",", "")
+        output = "".join(sorted(l for l in set(labels) if labels.count(l) == 1))
+
+    unused = [l for l in string.ascii_letters if l not in subscripts]
+    if len(unused) == 0:
+        return None
+    b = unused[0]
+    return ",".join(b + term for term in inputs.split(",")) + "->" + b + output
+
+@functools.lru_cache(maxsize=128)
+def _einsum_path(subscripts, shapes, optimize):
+    """ Cached contraction path of numpy.einsum for operands of given shapes
+
+    Args:
+         subscripts (str) : subscripts as in numpy.einsum
+         shapes (tuple)   : shapes of the operands
+         optimize (str)   : contraction path strategy as in numpy.einsum_path
+    Returns:
+         list : the contraction path
+    """
+    operands = [np.broadcast_to(0., shape) for shape in shapes]
+    return np.einsum_path(subscripts, *operands, optimize=optimize)[0]
+
+def einsum(subscripts, *operands, optimize='greedy'):
     """ Einstein summation on each block according to the numpy.einsum
 
+    The contraction path is only computed once for every distinct combination
+    of subscripts and operand shapes and cached across calls. Small
+    blocks of equal shape are contracted together in a single batched call.
+
     Args:
          subscripts (str) : Specifies the subscripts for summation as
                             comma separated list of subscript labels. 
                             see numpy.einsum documentation
          operands (list of ensemble.Array): These are the arrays for the operation.
+         optimize (bool, str): (optional) contraction path strategy as in
+                               numpy.einsum_path, default "greedy"
     Returns:
          ensemble.Array : The calculation based on the Einstein summation convention.
     """
@@ -213,9 +439,25 @@ def einsum(subscripts, *operands, optimize=False):
     ensembles = [o.ensemble for o in operands]
     if len(set(ensembles)) > 1:
         raise ValueError("operands do not share the same ensemble")
-    
-    data = OrderedDict()
-    for block, deg in ensembles[0]:
-        arrs = [o.array[block] for o in operands]
-        data[block] = np.einsum(subscripts, *arrs, optimize=optimize)
-    return Array(ensembles[0], data)
+
+    def contract(subs, arrs):
+        xp = _array_module(arrs[0])
+        if xp is not np:
+            return xp.einsum(subs, *arrs, optimize=optimize)
+        if optimize is False or not isinstance(optimize, (bool, str)):
+            return np.einsum(subs, *arrs, optimize=optimize)
+        path = _einsum_path(subs, tuple(arr.shape for arr in arrs), optimize)
+        return np.einsum(subs, *arrs, optimize=path)
+
+    batched_subscripts = _batched_subscripts(subscripts)
+    results = []
+    for key, blocks in _group_blocks(*operands).items():
+        size = max(int(np.prod(shape)) for shape, dtype in key)
+        if batched_subscripts is not None and len(blocks) > 1 and \
+           size <= _EINSUM_BATCH_SIZE:
+            stacks = [_stack(o, blocks) for o in operands]
+            results.append((blocks, contract(batched_subscripts, stacks)))
+        else:
+            results.append((blocks, [contract(subscripts, [o.array[block] for o in operands])
+                                     for block in blocks]))
+    return _from_groups(ensembles[0], results)
@@ -3,15 +3,91 @@ from .scalar import Scalar
 
 import numpy as np
 
-from collections import OrderedDict
+try:
+    import cupy
+except ImportError:
+    cupy = None
+
+def _array_module(arr):
+    """ Array module (numpy or cupy) an array belongs to
+
+    Arguments:
+        arr (array_like): numpy or cupy array, or any input to np.asarray
+    Returns:
+        module: cupy for cupy.ndarray, numpy otherwise
+    """
+    if cupy is not None and isinstance(arr, cupy.ndarray):
+        return cupy
+    return np
+
+def _group_blocks(*arrays):
+    """ Group the blocks whose arrays agree in shape and datatype for all operands
+
+    Arguments:
+        arrays (list of Array): arrays defined on the same ensemble
+    Returns:
+        dict: ((shape, dtype) of each operand) -> tuple of blocks
+    """
+    groups = dict()
+    for block in arrays[0].ensemble.blocks_tuple:
+        key = tuple((a.array[block].shape, a.array[block].dtype) for a in arrays)
+        groups.setdefault(key, []).append(block)
+    return dict((key, tuple(blocks)) for key, blocks in groups.items())
+
+def _stack(array, blocks):
+    """ Stack the arrays of the given blocks along a new leading axis
+
+    Arguments:
+        array (Array)        : array containing the blocks
+        blocks (tuple)       : blocks of equal shape and datatype
+    Returns:
+        np.ndarray: stacked arrays, reusing the cached stack of array if possible
+    """
+    arr = array.array[blocks[0]]
+    groups = array._cached_groups()
+    if groups is not None:
+        cached = groups.get((arr.shape, arr.dtype))
+        if cached is not None and cached[0] == blocks:
+            return cached[1]
+    if len(blocks) == 1:
+        return arr[np.newaxis]
+    return _array_module(arr).stack([array.array[block] for block in blocks])
+
+def _from_groups(ensemble, groups):
+    """ Create an Array from stacked results of grouped blocks
+
+    Arguments:
+        ensemble (Ensemble): ensemble defining blocks and degeneracies
+        groups (iterable)  : pairs of (tuple of blocks, stacked array or list of arrays)
+    Returns:
+        Array: array whose block arrays are the entries of the stacks
+    """
+    data = dict()
+    stacks = dict()
+    for blocks, stack in groups:
+        for block, arr in zip(blocks, stack):
+            data[block] = arr
+        if not isinstance(stack, list):
+            stacks.setdefault((stack.shape[1:], stack.dtype), []).append((blocks, stack))
+    array = Array(ensemble, data)
+
+    # the block arrays are views of the stacks, which can be cached if they
+    # coincide with the grouping by shape and datatype
+    if all(len(s) == 1 for s in stacks.values()) and \
+       sum(len(s[0][0]) for s in stacks.values()) == len(data):
+        array._set_groups(dict((key, s[0]) for key, s in stacks.items()))
+    return array
 
 class Array:
     """ Class defining an ensemble of array values
     
     Attributes:
         ensemble (Ensemble) :  ensemble defining blocks and degeneracies
-        array (OrderedDict) :  dictionary of scalar values for each block
+        array (dict)        :  dictionary of scalar values for each block
         ndim  (int)         :  number of dimensions of the arrays
+
+    The block arrays are numpy arrays, or cupy arrays if the Array has been
+    moved to a GPU by Array.to("cuda").
     """
 
     def __init__(self, ensemble, data, tag=None, dtype=None):
@@ -19,37 +95,99 @@ class Array:
     
         Arguments:
             ensemble (Ensemble): ensemble defining blocks and degeneracies
-            data (OrderedDict) : dictionary of arrays whose keys are blocks
+            data (dict)        : dictionary of arrays whose keys are blocks
             tag (str)          : (optional) tag specifying the key if data[block]
                                  is a dictionary and not an array
             dtype (np.dtype)   : (optional) datatype of the scalar values
+
+        The arrays in data are not copied if they already are np.ndarrays of
+        the requested datatype, and must not be modified afterwards.
         """
         self.ensemble = ensemble
-        self.array = OrderedDict()
+        self.array = dict()
         self.ndim = 1
+        self._groups = None
+        self._group_arrays = ()
 
         if not isinstance(ensemble, Ensemble):
             raise TypeError("ensemble is not of type pydiag.Ensemble")
-        if not isinstance(data, OrderedDict):
-            raise TypeError("data is not of type OrderedDict")
+        if not isinstance(data, dict):
+            raise TypeError("data is not of dictionary type")
 
         if tag == None:
             for block, deg in ensemble:
-                self.array[block] = np.array(data[block], dtype=dtype)
+                arr = data[block]
+                self.array[block] = _array_module(arr).asarray(arr, dtype=dtype)
         else:
             if not isinstance(tag, str):
                 raise TypeError("tag needs to be a string")
 
             for block, deg in ensemble:
-                self.array[block] = np.array(data[block][tag], dtype=dtype)
+                arr = data[block][tag]
+                self.array[block] = _array_module(arr).asarray(arr, dtype=dtype)
+
+        # determine the device the arrays reside on
+        devices = {_array_module(ar) is not np for ar in self.array.values()}
+        if len(devices) > 1:
+            raise ValueError("not all arrays reside on the same device")
+        self._device = "cuda" if True in devices else "cpu"
 
         # determine number of dimensions
-        ndims = np.unique([ar.ndim for ar in self.array.values()])
+        ndims = {ar.ndim for ar in self.array.values()}
         if len(ndims) != 1:
             raise ValueError("not all arrays have same number of dimensions")
         else:
-            self.ndim = ndims[0]
+            self.ndim = next(iter(ndims))
         
+    def to(self, device):
+        """ Move the arrays of all blocks to a device
+
+        Arguments:
+            device (str): "cpu" for numpy arrays or "cuda" for cupy arrays
+        Returns:
+            ensemble.Array: the array on the given device
+        """
+        if device == self._device:
+            return self
+        if device == "cuda":
+            if cupy is None:
+                raise ImportError("moving arrays to cuda requires cupy")
+            data = dict((block, cupy.asarray(arr)) for block, arr in self.items())
+        elif device == "cpu":
+            data = dict((block, cupy.asnumpy(arr)) for block, arr in self.items())
+        else:
+            raise ValueError("device must be either \"cpu\" or \"cuda\"")
+        return Array(self.ensemble, data)
+
+    def _set_groups(self, groups):
+        """ cache stacked groups of blocks
+
+        Arguments:
+            groups (dict): (shape, dtype) -> (tuple of blocks, stacked array),
+                           where the block arrays are views of the stacks
+        """
+        self._groups = groups
+        self._group_arrays = tuple(self.array.values())
+
+    def _cached_groups(self):
+        """ cached stacked groups of blocks, if they still alias the block arrays
+
+        The block arrays are views of the cached stacks, so in-place changes
+        of them are seen by the stacks. If a block array has been replaced
+        since caching, the cache is discarded.
+
+        Returns:
+            dict: (shape, dtype) -> (tuple of blocks, stacked array), or None
+        """
+        if self._groups is not None:
+            arrays = self.array.values()
+            if len(arrays) == len(self._group_arrays) and \
+               all(a is b for a, b in zip(arrays, self._group_arrays)):
+                return self._groups
+            self._groups = None
+            self._group_arrays = ()
+        return None
+
     def __str__(self):
         s = ""
         for block, deg in self.ensemble:
@@ -62,60 +200,87 @@ class Array:
     def __next__(self):
         return self.array.items().__next__()
 
-    def __add__(self, other):
+    def _elementwise(self, other, op):
+        """ Apply a binary operation blockwise to self and other
 
-        data = OrderedDict()
+        If the shape groups of self (and of an Array operand) are already
+        stacked and the stacks still alias the block arrays, the operation is
+        applied once per group of blocks. Scalar operands are broadcast along
+        the stacked axis.
+
+        Arguments:
+            other (scalar, Scalar, Array): second operand
+            op (np.ufunc)                : binary operation
+        Returns:
+            Array: result of the operation
+        """
+        groups = self._cached_groups()
         if np.isscalar(other):
+            if groups is not None:
+                return _from_groups(self.ensemble, [(blocks, op(stack, other))
+                                    for blocks, stack in groups.values()])
+            data = dict()
             for block, arr in self.items():
-                data[block] = arr + other 
+                data[block] = op(arr, other)
             return Array(self.ensemble, data)
+
+        if isinstance(other, Array):
+            other_groups = other._cached_groups()
+            if groups is not None and other_groups is not None:
+                pairs = list(zip(groups.values(), other_groups.values()))
+                if len(groups) == len(other_groups) and \
+                   all(blocks == other_blocks and stack.shape == other_stack.shape
+                       for (blocks, stack), (other_blocks, other_stack) in pairs):
+                    return _from_groups(self.ensemble, [(blocks, op(stack, other_stack))
+                        for (blocks, stack), (_, other_stack) in pairs])
+            other_map = other.array
+        elif isinstance(other, Scalar):
+            if groups is not None:
+                results = []
+                for blocks, stack in groups.values():
+                    values = [other.scalar[block] for block in blocks]
+                    # same promotion as the blockwise operation with each value
+                    values = _array_module(stack).asarray(
+                        values, dtype=np.result_type(stack.dtype, *values))
+                    values = values.reshape((len(blocks),) + (1,) * (stack.ndim - 1))
+                    results.append((blocks, op(stack, values)))
+                return _from_groups(self.ensemble, results)
+            other_map = other.scalar
         else:
-            for block, arr in self.items():
-                data[block] = arr + other[block] 
-            return Array(self.ensemble, data)
+            other_map = other
+
+        data = dict()
+        for block, arr in self.items():
+            data[block] = op(arr, other_map[block])
+        return Array(self.ensemble, data)
+
+    def __add__(self, other):
+        return self._elementwise(other, np.add)
         
     def __sub__(self, other):
-        data = OrderedDict()
-        if np.isscalar(other):
-            for block, arr in self.items():
-                data[block] = arr - other 
-            return Array(self.ensemble, data)
-        else:
-            for block, arr in self.items():
-                data[block] = arr - other[block] 
-            return Array(self.ensemble, data)
+        return self._elementwise(other, np.subtract)
 
     def __neg__(self):
-        data = OrderedDict()
+        groups = self._cached_groups()
+        if groups is not None:
+            return _from_groups(self.ensemble, [(blocks, -stack)
+                                for blocks, stack in groups.values()])
+        data = dict()
         for block, arr in self.items():
             data[block] = -arr
         return Array(self.ensemble, data)
         
     def __mul__(self, other):
-        data = OrderedDict()
-        if np.isscalar(other):
-            for block, arr in self.items():
-                data[block] = arr * other 
-        else:
-            for block, arr in self.items():
-                data[block] = arr * other[block] 
-        return Array(self.ensemble, data)
+        return self._elementwise(other, np.multiply)
 
     def __rmul__(self, other):
         return self.__mul__(other)
 
     def __truediv__(self, other):
-        data = OrderedDict()
-        if np.isscalar(other):
-            for block, arr in self.items():
-                data[block] = arr / other
-        else:
-            for block, arr in self.items():
-                data[block] = arr / other[block]
-        return Array(self.ensemble, data)
+        return self._elementwise(other, np.true_divide)
 
     def __getitem__(self, k):
-        data = OrderedDict()
+        data = dict()
         for block, arr in self.items():
             if len(arr) > 0:
                 data[block] = arr[k]
@@ -134,14 +299,22 @@ class Array:
 
     def flatten(self):
         """
-        Returns a flattened version of the entries same as in numpy.flatten
+        Returns a flattened version of the entries
+
+        Unlike numpy.flatten, no copy is made: the entries are flattened like
+        numpy.ravel and share memory with the original arrays whenever
+        possible, so modifying the result may modify the original arrays.
 
         Returns:
             ensemble.Array: The flattened array
         """
-        data = OrderedDict()
+        groups = self._cached_groups()
+        if groups is not None:
+            return _from_groups(self.ensemble, [(blocks, stack.reshape((len(blocks), -1)))
+                                for blocks, stack in groups.values()])
+        data = dict()
         for block, arr in self.items():
-            data[block] = arr.flatten()
+            data[block] = arr.ravel()
         return Array(self.ensemble, data)
 
     def concatenate(self, degeneracies=True):
@@ -162,19 +335,39 @@ class Array:
         else:
             return np.concatenate([arr for arr in self.values()])
 
+    def _reduce(self, op):
+        """ reduce the arrays of all blocks to scalars
+
+        The reduction is computed on the stacked groups of blocks and
+        converted to python scalars with a single tolist() per group. Stacks
+        are reused if cached, otherwise they are temporary and not cached.
+
+        Arguments:
+            op (callable): reduction supporting an axis argument, e.g. np.min
+        Returns:
+            ensemble.Scalar: reduced values of all blocks, None for empty blocks
+        """
+        groups = self._cached_groups()
+        if groups is None:
+            groups = dict((key[0], (blocks, _stack(self, blocks)))
+                          for key, blocks in _group_blocks(self).items())
+
+        data = dict()
+        for blocks, stack in groups.values():
+            if stack.ndim > 1 and stack.shape[1] == 0:
+                values = [None] * len(blocks)
+            else:
+                values = op(stack.reshape((len(blocks), -1)), axis=1).tolist()
+            data.update(zip(blocks, values))
+        return Scalar(self.ensemble, data)
+
     def min(self):
         """ compute minimal value of arrays in all blocks
     
         Returns:
             ensemble.Scalar: minimal values of all blocks
         """
-        data = OrderedDict()
-        for block, arr in self.items():
-            if len(arr) == 0:
-                data[block] = None
-            else:
-                data[block] = np.min(arr)
-        return Scalar(self.ensemble, data)
+        return self._reduce(np.min)
 
     def max(self):
         """ compute maximal value of arrays in all blocks
@@ -182,10 +375,4 @@ class Array:
         Returns:
             ensemble.Scalar: maximal values of all blocks
         """
-        data = OrderedDict()
-        for block, arr in self.items():
-            if len(arr) == 0:
-                data[block] = None
-            else:
-                data[block] = np.max(arr)
-        return Scalar(self.ensemble, data)
+        return self._reduce(np.max)
@@ -4,7 +4,7 @@ Ensemble class
 :author: Alexander Wietek
 """
 import itertools
-from collections import OrderedDict
+import types
 
 class Ensemble:
     """ class defining an ensemble of blocks with degeneracy
@@ -18,14 +18,19 @@ class Ensemble:
         $     print("blocks", block, deg)
 
     Attributes:
-        blocks (list of string tuples):  list of labels for the different blocks
-        degeneracy (OrderedDict)      :  dictionary of degeneracies for a block
+        blocks (tuple of string tuples): labels for the different blocks
+        degeneracy (mapping)           : read-only mapping of degeneracies for a block
+        blocks_tuple (tuple)           : blocks in the order of iteration
+
+    Ensembles compare equal if they have the same blocks and degeneracies in
+    the same order. They are hashable, hence blocks and degeneracy are
+    immutable.
     """
     
     def __init__(self, *args, default_degeneracy=1):
 
         self.blocks = []
-        self.degeneracy = OrderedDict()
+        self.degeneracy = dict()
 
         # convert each arg to degeneracy format
         args_formatted = []
@@ -66,10 +71,46 @@ class Ensemble:
             self.blocks.append(block)
             self.degeneracy[block] = deg
 
-        self.blocks = sorted(self.blocks)
+        self.blocks = tuple(sorted(self.blocks))
+        self.degeneracy = types.MappingProxyType(
+            {block: self.degeneracy[block] for block in self.blocks})
+        self._blocks_tuple = tuple(self.degeneracy)
+        self._items_tuple = tuple(self.degeneracy.items())
+        self._hash = hash(self._items_tuple)
+
+    @property
+    def blocks_tuple(self):
+        """ tuple of blocks in the order of iteration """
+        return self._blocks_tuple
 
     def __iter__(self):
-        return self.degeneracy.items().__iter__()
+        return iter(self._items_tuple)
+
+    def keys(self):
+        """ iterator over the blocks, without their degeneracies """
+        return iter(self._blocks_tuple)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Ensemble):
+            return NotImplemented
+        return self._hash == other._hash and self._items_tuple == other._items_tuple
+
+    def __hash__(self):
+        return self._hash
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["degeneracy"] = dict(self.degeneracy)
+        # string hashes differ between interpreters, recomputed on unpickling
+        del state["_hash"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.degeneracy = types.MappingProxyType(self.degeneracy)
+        self._hash = hash(self._items_tuple)
 
     def __next__(self):
         return self.degeneracy.items().__next__()
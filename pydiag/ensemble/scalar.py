@@ -1,15 +1,34 @@
 from .ensemble import Ensemble
 
+import numbers
+import operator
 import numpy as np
 
-from collections import OrderedDict
+# values of these types are backed by a numpy array for vectorized arithmetic
+_ARRAY_TYPES = (float, complex, np.floating, np.complexfloating)
+
+def _to_array(values):
+    """ Convert scalar values to a numpy array, None is stored as zero
+
+    Returns:
+        np.ndarray: the values, or None if the values which are not None are
+                    not all floating point or all complex numbers of one type
+        np.ndarray: boolean mask of the values which are not None
+    """
+    values = list(values)
+    types = set(type(v) for v in values if v is not None)
+    if len(types) != 1 or not issubclass(next(iter(types)), _ARRAY_TYPES):
+        return None, None
+    valid_mask = np.array([v is not None for v in values], dtype=bool)
+    values = [0. if v is None else v for v in values]
+    return np.array(values, dtype=next(iter(types))), valid_mask
 
 class Scalar:
     """ Class defining an ensemble of scalar values
     
     Attributes:
         ensemble (Ensemble) :  ensemble defining blocks and degeneracies
-        scalar (OrderedDict):  dictionary of scalar values for each block
+        scalar (dict)       :  dictionary of scalar values for each block
     """
 
     def __init__(self, ensemble, data, tag=None, dtype=None):
@@ -17,20 +36,20 @@ class Scalar:
     
         Arguments:
             ensemble (Ensemble): ensemble defining blocks and degeneracies
-            data (OrderedDict) : dictionary of scalars whose keys are blocks
+            data (dict)        : dictionary of scalars whose keys are blocks
             tag (str)          : (optional) tag specifying the key if data[block]
                                  is a dictionary and not an array
             dtype (np.dtype)   : (optional) datatype of the scalar values
         """
         self.ensemble = ensemble
-        self.scalar = OrderedDict()
+        self.scalar = dict()
 
         if not isinstance(ensemble, Ensemble):
             raise TypeError("ensemble is not of type pydiag.Ensemble")
-        if not isinstance(data, OrderedDict) and not isinstance(data, dict):
+        if not isinstance(data, dict):
             raise TypeError("data is not of dictionary type")
 
-        for block, deg in ensemble:
+        for block in ensemble.keys():
             if tag == None:
                 dt = data[block]
             else:
@@ -51,53 +70,123 @@ class Scalar:
                         self.scalar[block] = dtype(dt.item())
                     else:
                         self.scalar[block] = dtype(dt)
+
+        self._keys = tuple(self.scalar.keys())
+        self._arr, self._valid_mask = _to_array(self.scalar.values())
     
+    @classmethod
+    def _from_validated(cls, ensemble, scalar, arr=None, valid_mask=None):
+        """ Create a Scalar from already validated data, skipping the checks
+        of the constructor
+
+        Arguments:
+            ensemble (Ensemble): ensemble defining blocks and degeneracies
+            scalar (dict)      : dictionary of python scalars or None for every
+                                 block in the order of the ensemble
+            arr (np.ndarray)   : (optional) values of scalar as numpy array,
+                                 only if they are floating point or complex
+            valid_mask (np.ndarray): (optional) boolean mask of the values in
+                                     arr which are not None, required with arr
+        Returns:
+            ensemble.Scalar: the new Scalar
+        """
+        obj = cls.__new__(cls)
+        obj.ensemble = ensemble
+        obj.scalar = scalar
+        obj._keys = tuple(scalar.keys())
+        if arr is None:
+            arr, valid_mask = _to_array(scalar.values())
+        obj._arr = arr
+        obj._valid_mask = valid_mask
+        return obj
+
     def __str__(self):
         s = ""
-        for block, deg in self.ensemble:
+        for block in self.ensemble.keys():
             s += str(block) + ": " + str(self.scalar[block]) + "\n"
         return s
 
     def __iter__(self):
-        return self.scalar.items().__iter__()
+        return iter(self.scalar.items())
 
-    def __next__(self):
-        return self.scalar.items().__next__()
+    def _arithmetic(self, other, op):
+        """ Apply a binary operation to the values of all blocks at once
 
-    def __add__(self, other):
-        data = OrderedDict()
+        Arguments:
+            other (scalar, Scalar): second operand
+            op (np.ufunc)         : binary operation
+        Returns:
+            ensemble.Scalar: result of the operation, or None if it cannot be
+                             vectorized with the same result as blockwise
+        """
+        # None values and division by zero are left to the blockwise
+        # operation, which raises the same exceptions as python scalars
+        if self._arr is None or not self._valid_mask.all():
+            return None
+        if isinstance(other, Scalar):
+            if other._keys == self._keys:
+                other, other_mask = other._arr, other._valid_mask
+            else:
+                other, other_mask = _to_array(other.scalar[block] for block in self._keys)
+            if other is None or not other_mask.all():
+                return None
+        elif not isinstance(other, numbers.Number):
+            return None
+        if op is np.true_divide and np.any(other == 0):
+            return None
+
+        arr = op(self._arr, other)
+        return Scalar._from_validated(self.ensemble, dict(zip(self._keys, arr.tolist())),
+                                      arr, self._valid_mask)
+
+    def _blockwise(self, other, op):
+        """ Apply a binary operation to the values block by block
+
+        Arguments:
+            other (scalar, Scalar, dict): second operand
+            op (callable)               : binary operation
+        Returns:
+            ensemble.Scalar: result of the operation
+        """
+        data = dict()
         if np.isscalar(other):
-            for block, arr in self.items():
-                data[block] = arr + other 
-            return Scalar(self.ensemble, data)
+            for block, val in self.items():
+                data[block] = op(val, other)
         else:
-            for block, arr in self.items():
-                data[block] = arr + other[block] 
-            return Scalar(self.ensemble, data)
+            for block, val in self.items():
+                data[block] = op(val, other[block])
+        return Scalar._from_validated(self.ensemble, data)
+
+    def __add__(self, other):
+        if np.isscalar(other) or isinstance(other, Scalar):
+            result = self._arithmetic(other, np.add)
+            if result is not None:
+                return result
+        return self._blockwise(other, operator.add)
         
     def __sub__(self, other):
-        data = OrderedDict()
-        if np.isscalar(other):
-            for block, arr in self.items():
-                data[block] = arr - other 
-            return Scalar(self.ensemble, data)
-        else:
-            for block, arr in self.items():
-                data[block] = arr - other[block] 
-            return Scalar(self.ensemble, data)
+        if np.isscalar(other) or isinstance(other, Scalar):
+            result = self._arithmetic(other, np.subtract)
+            if result is not None:
+                return result
+        return self._blockwise(other, operator.sub)
 
     def __neg__(self):
-        data = OrderedDict()
-        for block, arr in self.items():
-            data[block] = -arr
-        return Array(self.ensemble, data)
+        if self._arr is None or not self._valid_mask.all():
+            data = dict()
+            for block, val in self.items():
+                data[block] = -val
+            return Scalar._from_validated(self.ensemble, data)
+        arr = -self._arr
+        return Scalar._from_validated(self.ensemble, dict(zip(self._keys, arr.tolist())),
+                                      arr, self._valid_mask)
         
     def __mul__(self, other):
-        data = OrderedDict()
-        if np.isscalar(other):
-            for block, arr in self.items():
-                data[block] = arr * other 
-            return Scalar(self.ensemble, data)
+        if np.isscalar(other) or isinstance(other, Scalar):
+            result = self._arithmetic(other, np.multiply)
+            if result is not None:
+                return result
+            return self._blockwise(other, operator.mul)
         else:
             return other.__mul__(self)
 
@@ -105,11 +194,11 @@ class Scalar:
         return self.__mul__(other)
 
     def __truediv__(self, other):
-        data = OrderedDict()
-        if np.isscalar(other):
-            for block, arr in self.items():
-                data[block] = arr / other 
-            return Scalar(self.ensemble, data)
+        if np.isscalar(other) or isinstance(other, Scalar):
+            result = self._arithmetic(other, np.true_divide)
+            if result is not None:
+                return result
+            return self._blockwise(other, operator.truediv)
         else:
             return other.__truediv__(self)
 
@@ -117,14 +206,24 @@ class Scalar:
         return self.scalar[k]
     
     def keys(self):
-        return self.scalar.keys().__iter__()
+        return iter(self.scalar)
 
     def values(self):
-        return self.scalar.values().__iter__()
+        return iter(self.scalar.values())
 
     def items(self):
-        return self.scalar.items().__iter__()
+        return iter(self.scalar.items())
+
 
+    def _comparable_values(self):
+        """ real values which are not None as numpy array, or None if they are
+        not backed by a numpy array, complex or contain nan """
+        if self._arr is None or self._arr.dtype.kind != "f":
+            return None
+        values = self._arr[self._valid_mask]
+        if np.isnan(values).any():
+            return None
+        return values
 
     def min(self):
         """ compute minimal value of scalars across the blocks
@@ -132,7 +231,10 @@ class Scalar:
         Returns:
             scalar:  minimal scalar
         """
-        return min([s for s in self.scalar.values() if s is not None])
+        values = self._comparable_values()
+        if values is None:
+            return min([s for s in self.scalar.values() if s is not None])
+        return values.min().item()
 
     def max(self):
         """ compute max value of scalars across the blocks
@@ -140,4 +242,7 @@ class Scalar:
         Returns:
             scalar:  maximal scalar
         """
-        return max([s for s in self.scalar.values() if s is not None])
+        values = self._comparable_values()
+        if values is None:
+            return max([s for s in self.scalar.values() if s is not None])
+        return values.max().item()
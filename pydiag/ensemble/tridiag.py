@@ -5,16 +5,267 @@ from .scalar import Scalar
 import numpy as np
 import scipy as sp
 import scipy.linalg
+import scipy.linalg.lapack
 
-from collections import OrderedDict
+import os
+import math
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import tridiag_wrapper
+except ImportError:
+    tridiag_wrapper = None
+
+# blocks of at least this dimension are solved concurrently by a thread pool
+_PARALLEL_DIM = 128
+
+# smallest eigenvalues of blocks below this dimension, which are not solved
+# by tridiag_wrapper, are computed by a compiled Sturm sequence bisection if
+# numba is available
+_STURM_MAX_DIM = 200
+
+@functools.lru_cache(maxsize=None)
+def _lapack_func(name, dtype):
+    """ LAPACK routine for a given datatype, looked up only once
+
+    Arguments:
+        name (str)      : name of the routine without type prefix, e.g. 'stevd'
+        dtype (np.dtype): datatype of the arguments
+    Returns:
+        callable: the scipy wrapper of the LAPACK routine
+    """
+    func, = sp.linalg.lapack.get_lapack_funcs((name,), (np.empty(0, dtype=dtype),))
+    return func
+
+def _stevd(d, e, compute_v=True, overwrite_d=False):
+    """ Eigen decomposition of a symmetric tridiagonal matrix by the
+    divide-and-conquer LAPACK driver stevd
+
+    Arguments:
+        d (np.ndarray)    : diagonal entries
+        e (np.ndarray)    : off-diagonal entries
+        compute_v (bool)  : flag whether eigenvectors are computed
+        overwrite_d (bool): flag whether the eigenvalues may be written to d
+    Returns:
+        np.ndarray: eigenvalues in ascending order
+        np.ndarray: eigenvectors as columns (only if compute_v)
+    """
+    stevd = _lapack_func('stevd', np.result_type(d, e))
+    w, z, info = stevd(d, e, compute_v=compute_v, overwrite_d=overwrite_d)
+    if info != 0:
+        raise np.linalg.LinAlgError("stevd failed with info={}".format(info))
+    if compute_v:
+        return w, z
+    else:
+        return w
+
+def _eig2(d, e, compute_v=True, overwrite_d=False):
+    """ Eigen decomposition of a symmetric tridiagonal 2x2 matrix in closed
+    form, avoiding the overhead of a LAPACK call
+
+    Arguments:
+        d (np.ndarray)    : the two diagonal entries
+        e (np.ndarray)    : the off-diagonal entry
+        compute_v (bool)  : flag whether eigenvectors are computed
+        overwrite_d (bool): flag whether the eigenvalues may be written to d
+    Returns:
+        np.ndarray: eigenvalues in ascending order
+        np.ndarray: eigenvectors as columns (only if compute_v)
+    """
+    a, c, b = float(d[0]), float(d[1]), float(e[0])
+    mean = 0.5 * (a + c)
+    radius = math.hypot(0.5 * (a - c), b)
+    w = d if overwrite_d else np.empty(2, dtype=d.dtype)
+    w[0] = mean - radius
+    w[1] = mean + radius
+    if not compute_v:
+        return w
+
+    # rotation by theta with tan(2 theta) = 2b / (a - c) diagonalizes the matrix
+    theta = 0.5 * math.atan2(2. * b, a - c)
+    cs, sn = math.cos(theta), math.sin(theta)
+    z = np.empty((2, 2), dtype=d.dtype)
+    z[0, 0] = -sn
+    z[0, 1] = cs
+    z[1, 0] = cs
+    z[1, 1] = sn
+    return w, z
+
+def _stebz_smallest(d, e):
+    """ Smallest eigenvalue of a symmetric tridiagonal matrix by bisection
+    using the LAPACK routine stebz
+
+    Arguments:
+        d (np.ndarray) : diagonal entries
+        e (np.ndarray) : off-diagonal entries
+    Returns:
+        float: the smallest eigenvalue
+    """
+    stebz = _lapack_func('stebz', np.result_type(d, e))
+    # range 2 selects eigenvalues by index, here only the first one
+    m, w, iblock, isplit, info = stebz(d, e, 2, 0., 0., 1, 1, 0., 'E')
+    if info != 0:
+        raise np.linalg.LinAlgError("stebz failed with info={}".format(info))
+    return w[0]
+
+def _sturm_count(d, e2, x, pivmin):
+    """ Number of eigenvalues of a symmetric tridiagonal matrix below x,
+    given by the negative pivots of the LDL^T factorization of T - x
+
+    Arguments:
+        d (np.ndarray) : diagonal entries
+        e2 (np.ndarray): squared off-diagonal entries
+        x (float)      : shift
+        pivmin (float) : minimal absolute value of a pivot
+    Returns:
+        int: number of eigenvalues smaller than x
+    """
+    count = 0
+    q = d[0] - x
+    if abs(q) < pivmin:
+        q = -pivmin
+    if q < 0:
+        count += 1
+    for i in range(1, len(d)):
+        q = d[i] - x - e2[i-1] / q
+        if abs(q) < pivmin:
+            q = -pivmin
+        if q < 0:
+            count += 1
+    return count
+
+def _sturm_smallest(d, e2):
+    """ Smallest eigenvalue of a symmetric tridiagonal matrix by bisection
+    of the Sturm count, starting from the Gershgorin interval
+
+    Arguments:
+        d (np.ndarray) : diagonal entries
+        e2 (np.ndarray): squared off-diagonal entries
+    Returns:
+        float: the smallest eigenvalue
+    """
+    n = len(d)
+    lo = np.inf
+    hi = -np.inf
+    e2max = 1.
+    for i in range(n):
+        radius = 0.
+        if i > 0:
+            radius += np.sqrt(e2[i-1])
+        if i < n-1:
+            radius += np.sqrt(e2[i])
+            e2max = max(e2max, e2[i])
+        lo = min(lo, d[i] - radius)
+        hi = max(hi, d[i] + radius)
+    pivmin = np.finfo(np.float64).tiny * e2max
+    eps = np.finfo(np.float64).eps
+
+    while hi - lo > 2 * eps * max(abs(lo), abs(hi)):
+        mid = 0.5 * (lo + hi)
+        if mid <= lo or mid >= hi:
+            break
+        if _sturm_count(d, e2, mid, pivmin) > 0:
+            hi = mid
+        else:
+            lo = mid
+    return 0.5 * (lo + hi)
+
+def _sturm_smallest_batch(d, e2, offsets):
+    """ Smallest eigenvalues of several symmetric tridiagonal matrices
+    stored consecutively in d and e2
+
+    Arguments:
+        d (np.ndarray)      : concatenated diagonal entries
+        e2 (np.ndarray)     : squared off-diagonal entries, aligned with d
+        offsets (np.ndarray): start of every matrix in d, and the total length
+    Returns:
+        np.ndarray: the smallest eigenvalue of every matrix
+    """
+    n_mats = len(offsets) - 1
+    e0 = np.empty(n_mats)
+    for b in _prange(n_mats):
+        start = offsets[b]
+        end = offsets[b+1]
+        e0[b] = _sturm_smallest(d[start:end], e2[start:end])
+    return e0
+
+if numba is not None:
+    _prange = numba.prange
+    _sturm_count = numba.njit(cache=True)(_sturm_count)
+    _sturm_smallest = numba.njit(cache=True)(_sturm_smallest)
+    _sturm_smallest_batch = numba.njit(parallel=True, cache=True)(_sturm_smallest_batch)
+else:
+    _prange = range
+
+def _sturm_smallest_blocks(diags, offdiags):
+    """ Smallest eigenvalues of many small tridiagonal matrices with a single
+    call of the compiled bisection
+
+    Arguments:
+        diags (list)   : diagonal entries of every matrix
+        offdiags (list): off-diagonal entries of every matrix
+    Returns:
+        list: the smallest eigenvalue of every matrix
+    """
+    offsets = np.zeros(len(diags) + 1, dtype=np.int64)
+    np.cumsum([len(d) for d in diags], out=offsets[1:])
+    d = np.concatenate(diags).astype(np.float64, copy=False)
+    e2 = np.zeros(offsets[-1])
+    for start, e in zip(offsets, offdiags):
+        e2[start:start+len(e)] = np.square(e)
+    return _sturm_smallest_batch(d, e2, offsets).tolist()
+
+def _stevd_many(diags, offdiags, compute_v=True):
+    """ Eigen decompositions of many symmetric tridiagonal matrices by a
+    single call of the compiled tridiag_wrapper, running stevd without the GIL
+
+    Arguments:
+        diags (list)    : diagonal entries of every matrix
+        offdiags (list) : off-diagonal entries of every matrix
+        compute_v (bool): flag whether eigenvectors are computed
+    Returns:
+        list: eigenvalues of every matrix in ascending order
+        list: eigenvectors as columns of every matrix (None if not compute_v)
+    """
+    evals, evecs, info = tridiag_wrapper.stevd_many(diags, offdiags, compute_v)
+    if np.any(info != 0):
+        raise np.linalg.LinAlgError("stevd failed with info={}".format(info[info != 0][0]))
+    if evecs is None:
+        evecs = [None] * len(evals)
+    return evals, evecs
+
+def _stebz_smallest_many(diags, offdiags):
+    """ Smallest eigenvalues of many symmetric tridiagonal matrices by a
+    single call of the compiled tridiag_wrapper, running stebz without the GIL
+
+    Arguments:
+        diags (list)   : diagonal entries of every matrix
+        offdiags (list): off-diagonal entries of every matrix
+    Returns:
+        list: the smallest eigenvalue of every matrix
+    """
+    e0, info = tridiag_wrapper.stebz_smallest_many(diags, offdiags)
+    if np.any(info != 0):
+        raise np.linalg.LinAlgError("stebz failed with info={}".format(info[info != 0][0]))
+    return e0.tolist()
 
 class TriDiag:
     """ Class defining an ensemble of symmetric tridiagonal matrices
     
     Attributes:
         ensemble (Ensemble)  :  ensemble defining blocks and degeneracies
-        diag (OrderedDict)   :  dictionary of diagonal entries for each block
-        offdiag (OrderedDict):  dictionary of off-diagonal entries for each block
+        diag (dict)          :  dictionary of diagonal entries for each block
+        offdiag (dict)       :  dictionary of off-diagonal entries for each block
+
+    The diagonals are copied from the data on construction. Eigenvalues and
+    eigenvectors are computed once per block and cached, the arrays returned
+    by eig() and eigvals() are shared with the cache and therefore read-only.
     """
 
     def __init__(self, ensemble, data, diag_tag="diag", offdiag_tag="offdiag", dtype=None):
@@ -22,28 +273,34 @@ class TriDiag:
     
         Arguments:
             ensemble (Ensemble): ensemble defining blocks and degeneracies
-            data (OrderedDict) : dictionary of arrays whose keys are blocks
+            data (dict)        : dictionary of arrays whose keys are blocks
             diag_tag (str)     : tag specifying the key of diagonals in data[block]
             offdiag_tag (str)  : tag specifying the key of off-diagonals in data[block]
             dtype (np.dtype)   : (optional) datatype of the scalar values
         """
         self.ensemble = ensemble
-        self.diag = OrderedDict()
-        self.offdiag = OrderedDict()        
+        self.diag = dict()
+        self.offdiag = dict()        
+        self._eig_cache = dict()
 
         if not isinstance(ensemble, Ensemble):
             raise TypeError("ensemble is not of type pydiag.Ensemble")
-        if not isinstance(data, OrderedDict):
-            raise TypeError("data is not of type OrderedDict")
+        if not isinstance(data, dict):
+            raise TypeError("data is not of dictionary type")
         if not isinstance(diag_tag, str) or not isinstance(offdiag_tag, str):
             raise TypeError("diag_tag / offdiag_tag both need to be strings")
-        
-        ens_diag = Array(ensemble, data, tag=diag_tag, dtype=dtype)
-        ens_offdiag = Array(ensemble, data, tag=offdiag_tag, dtype=dtype)        
 
-        for block, deg in ensemble:
-            d = ens_diag.array[block].flatten()
-            od = ens_offdiag.array[block].flatten()
+        # the diagonals are copied, such that the cached eigen decompositions
+        # cannot become stale by later modifications of data
+        for block in ensemble.keys():
+            d = np.array(data[block][diag_tag], dtype=dtype).ravel()
+            od = np.array(data[block][offdiag_tag], dtype=dtype).ravel()
+            if dtype is None:
+                # convert once to the common floating point type LAPACK
+                # operates on, instead of in every call of the eigensolvers
+                ftype = np.result_type(d, od, np.float32)
+                d = d.astype(ftype, copy=False)
+                od = od.astype(ftype, copy=False)
 
             if len(d) == len(od):
                 self.diag[block] = d
@@ -57,73 +314,257 @@ class TriDiag:
 
     def __str__(self):
         s = ""
-        for block, deg in self.ensemble:
+        for block in self.ensemble.keys():
             s += str(block) + ": dim=" + str(len(self.diag[block])) + "\n"
         return s
 
     def __iter__(self):
-        return zip(self.diag.keys().__iter__(), \
-                   self.diag.values().__iter__(), \
-                   self.offdiag.values().__iter__())
-
-    def __next__(self):
-        return zip(self.diag.keys().__next__(), \
-                   self.diag.values().__next__(), \
-                   self.offdiag.values().__next__())
+        yield from zip(self.diag.keys(), self.diag.values(), self.offdiag.values())
 
-
-    
     def keys(self):
-        return self.diag.keys().__iter__()
+        return iter(self.diag)
 
     def values(self):
-        return zip(self.diag.values().__iter__(), \
-                   self.offdiag.values().__iter__())
+        return zip(self.diag.values(), self.offdiag.values())
 
     def items(self):
         return self.__iter__()
 
+    def _map_blocks(self, func, blocks=None, diag=None):
+        """ Apply a function to the diagonal and off-diagonal of blocks
+
+        Blocks of dimension at least _PARALLEL_DIM are processed concurrently
+        by a thread pool, since LAPACK releases the GIL. Smaller blocks are
+        processed serially, where dispatching to threads costs more than
+        the work itself.
+
+        Arguments:
+            func (callable): function of (diag, offdiag) of a block
+            blocks (list)  : (optional) blocks to process, default all blocks
+            diag (dict)    : (optional) diagonals passed to func instead of self.diag
+        Returns:
+            dict: results of func for every block
+        """
+        if blocks is None:
+            blocks = self.ensemble.blocks_tuple
+        if diag is None:
+            diag = self.diag
+        large = [block for block in blocks if len(self.diag[block]) >= _PARALLEL_DIM]
+
+        results = dict()
+        if len(large) > 1:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = dict((block, executor.submit(func, diag[block],
+                                                       self.offdiag[block]))
+                               for block in large)
+                for block in blocks:
+                    if block not in futures:
+                        results[block] = func(diag[block], self.offdiag[block])
+                for block, future in futures.items():
+                    results[block] = future.result()
+        else:
+            for block in blocks:
+                results[block] = func(diag[block], self.offdiag[block])
+        return dict((block, results[block]) for block in blocks)
+
+    def _compiled_blocks(self, blocks):
+        """ Split blocks into those solved by the compiled tridiag_wrapper and
+        the remaining ones
+
+        If tridiag_wrapper is available, all small float64 blocks are solved
+        in one call of it, avoiding the overhead of the scipy wrappers per
+        block. Large blocks are left to the thread pool of _map_blocks.
+
+        Arguments:
+            blocks (list): blocks to split
+        Returns:
+            list: blocks to be solved by tridiag_wrapper
+            list: remaining blocks
+        """
+        if tridiag_wrapper is None:
+            return [], blocks
+        compiled = []
+        remaining = []
+        for block in blocks:
+            d, e = self.diag[block], self.offdiag[block]
+            if 2 < len(d) < _PARALLEL_DIM and d.dtype == np.float64 and \
+               e.dtype == np.float64:
+                compiled.append(block)
+            else:
+                remaining.append(block)
+        return compiled, remaining
+
+    def _eigval_buffers(self, blocks):
+        """ Copies of the diagonals of blocks, into which the eigenvalues are
+        computed in place
+
+        The diagonals of all blocks with the same datatype are copied into a
+        single buffer, such that there is one allocation for the eigenvalues
+        of these blocks instead of one per block.
+
+        Arguments:
+            blocks (list): blocks whose diagonals are copied
+        Returns:
+            dict: contiguous views of the buffers for every block
+        """
+        by_dtype = dict()
+        for block in blocks:
+            by_dtype.setdefault(self.diag[block].dtype, []).append(block)
+
+        buffers = dict()
+        for dtype, dtype_blocks in by_dtype.items():
+            diags = [self.diag[block] for block in dtype_blocks]
+            buf = np.concatenate(diags)
+            start = 0
+            for block, d in zip(dtype_blocks, diags):
+                buffers[block] = buf[start:start+len(d)]
+                start += len(d)
+        return buffers
+
+    def _cache_eig(self, results):
+        """ Store eigen decompositions in the cache as read-only arrays
+
+        Arguments:
+            results (iterable): pairs of block and (eigenvalues, eigenvectors
+                                or None)
+        """
+        for block, (evals, evecs) in results:
+            evals.flags.writeable = False
+            if evecs is not None:
+                evecs.flags.writeable = False
+            self._eig_cache[block] = (evals, evecs)
 
-    
     def eig0(self):
         """ Compute the smallest eigenvalue of the tridiagonal blocks
     
+        The smallest eigenvalue of a block is obtained by the first of the
+        following routes which applies to it:
+
+        1. the eigenvalues cached by eig() or eigvals()
+        2. a single call of the compiled tridiag_wrapper for all float64
+           blocks of dimension 3 to _PARALLEL_DIM-1, if it is available
+        3. a single call of the numba Sturm bisection for the remaining real
+           blocks of dimension 3 to _STURM_MAX_DIM-1, if numba is available
+        4. per block, in closed form up to dimension 2 and by stebz otherwise
+
         Returns:
             ensemble.Scalar:  the smallest eigenvalue of each block
         """
-        data_e0 = OrderedDict()
-        for block, deg in self.ensemble:
-            if len(self.diag[block]) == 0:
-                data_e0[block] = None
-            elif len(self.diag[block]) == 1:
-                data_e0[block] = self.diag[block][0]
+        def solve(d, e):
+            if len(d) == 0:
+                return None
+            elif len(d) == 1:
+                return d[0]
+            elif len(d) == 2:
+                return _eig2(d, e, compute_v=False)[0]
+            else:
+                return _stebz_smallest(d, e)
+
+        data_e0 = dict()
+        missing = []
+        for block in self.ensemble.blocks_tuple:
+            if block in self._eig_cache:
+                evals = self._eig_cache[block][0]
+                data_e0[block] = evals[0] if len(evals) > 0 else None
             else:
-                data_e0[block] = \
-                    sp.linalg.eigvalsh_tridiagonal(self.diag[block], self.offdiag[block],\
-                                            'i', select_range=(0,0), check_finite=False)[0]
+                missing.append(block)
+
+        compiled, missing = self._compiled_blocks(missing)
+        if len(compiled) > 0:
+            data_e0.update(zip(compiled, _stebz_smallest_many(
+                [self.diag[block] for block in compiled],
+                [self.offdiag[block] for block in compiled])))
+
+        if numba is not None:
+            bisected = [block for block in missing
+                        if 2 < len(self.diag[block]) < _STURM_MAX_DIM and
+                        not np.iscomplexobj(self.diag[block])]
+            if len(bisected) > 0:
+                bisected_set = set(bisected)
+                missing = [block for block in missing if block not in bisected_set]
+                data_e0.update(zip(bisected, _sturm_smallest_blocks(
+                    [self.diag[block] for block in bisected],
+                    [self.offdiag[block] for block in bisected])))
+
+        data_e0.update(self._map_blocks(solve, missing))
         return Scalar(self.ensemble, data_e0)
             
-    def eig(self):
+    def eig(self, select='a', select_range=None):
         """ Compute the eigen decomposition of the tridiagonal blocks
     
+        Arguments:
+            select (str)        : (optional) eigenpairs to compute, 'a' for all,
+                                  'v' for eigenvalues in the interval select_range,
+                                  'i' for the eigenvalue indices in select_range
+            select_range (tuple): (optional) (min, max) of the eigenvalues or
+                                  the indices for select 'v' or 'i'
         Returns:
             ensemble.Array:  1d ensemble.Array containing the eigenvalues
             ensemble.Array:  2d ensemble.Array containing the eigenvectors
         """
-        data_evals = OrderedDict()
-        data_evecs = OrderedDict()
-        for block, deg in self.ensemble:
-            if len(self.diag[block]) == 0:
-                data_evals[block] = np.empty((0,))
-                data_evecs[block] = np.empty((0,0))
-            elif len(self.diag[block]) == 1:
-                data_evals[block] = self.diag[block]
-                data_evecs[block] = np.ones((1,1))
+        if select != 'a':
+            return self._eig_select(select, select_range)
+
+        def solve(d, e):
+            if len(d) == 0:
+                return np.empty((0,)), np.empty((0,0))
+            elif len(d) == 1:
+                return d, np.ones((1,1))
+            elif len(d) == 2:
+                return _eig2(d, e, overwrite_d=True)
             else:
-                data_evals[block], data_evecs[block] = \
-                    sp.linalg.eigh_tridiagonal(self.diag[block], self.offdiag[block],
-                                               check_finite=False, select='a',
-                                               lapack_driver='stev')
+                return _stevd(d, e, overwrite_d=True)
+        missing = [block for block in self.ensemble.blocks_tuple
+                   if self._eig_cache.get(block, (None, None))[1] is None]
+        compiled, missing = self._compiled_blocks(missing)
+        self._cache_eig(self._map_blocks(solve, missing,
+                                         self._eigval_buffers(missing)).items())
+        if len(compiled) > 0:
+            evals, evecs = _stevd_many([self.diag[block] for block in compiled],
+                                       [self.offdiag[block] for block in compiled])
+            self._cache_eig(zip(compiled, zip(evals, evecs)))
+
+        data_evals = dict()
+        data_evecs = dict()
+        for block in self.ensemble.keys():
+            data_evals[block], data_evecs[block] = self._eig_cache[block]
+        return Array(self.ensemble, data_evals), Array(self.ensemble, data_evecs)
+
+    def _eig_select(self, select, select_range):
+        """ Compute a subset of the eigenpairs of the tridiagonal blocks by
+        bisection and inverse iteration, bypassing the cache
+
+        Arguments:
+            select (str)        : 'v' for eigenvalues in the interval select_range,
+                                  'i' for the eigenvalue indices in select_range
+            select_range (tuple): (min, max) of the eigenvalues or the indices
+        Returns:
+            ensemble.Array:  1d ensemble.Array containing the eigenvalues
+            ensemble.Array:  2d ensemble.Array containing the eigenvectors
+        """
+        if select not in ('v', 'i'):
+            raise ValueError("select must be one of 'a', 'v' or 'i'")
+        if select_range is None or len(select_range) != 2:
+            raise ValueError("select_range needs to be a tuple (min, max)")
+
+        def solve(d, e):
+            n = len(d)
+            block_range = select_range
+            if select == 'i':
+                # indices beyond the dimension of a block are ignored
+                block_range = (max(select_range[0], 0), min(select_range[1], n-1))
+            if n == 0 or block_range[0] > block_range[1]:
+                return np.empty((0,), dtype=d.dtype), np.empty((n, 0), dtype=d.dtype)
+            return sp.linalg.eigh_tridiagonal(d, e, select=select,
+                                              select_range=block_range,
+                                              check_finite=False,
+                                              lapack_driver='stebz')
+        results = self._map_blocks(solve)
+
+        data_evals = dict()
+        data_evecs = dict()
+        for block in self.ensemble.keys():
+            data_evals[block], data_evecs[block] = results[block]
         return Array(self.ensemble, data_evals), Array(self.ensemble, data_evecs)
 
     def eigvals(self):
@@ -132,17 +573,29 @@ class TriDiag:
         Returns:
             ensemble.Array:  1d ensemble.Array containing the eigenvalues
         """
-        data_evals = OrderedDict()
-        for block, deg in self.ensemble:
-            if len(self.diag[block]) == 0:
-                data_evals[block] = np.empty((0,))
-            elif len(self.diag[block]) == 1:
-                data_evals[block] = self.diag[block]
+        def solve(d, e):
+            if len(d) == 0:
+                return np.empty((0,)), None
+            elif len(d) == 1:
+                return d, None
+            elif len(d) == 2:
+                return _eig2(d, e, compute_v=False, overwrite_d=True), None
             else:
-                data_evals[block] = sp.linalg.eigvalsh_tridiagonal(
-                    self.diag[block], self.offdiag[block],
-                    check_finite=False, select='a')
+                return _stevd(d, e, compute_v=False, overwrite_d=True), None
+        missing = [block for block in self.ensemble.blocks_tuple
+                   if block not in self._eig_cache]
+        compiled, missing = self._compiled_blocks(missing)
+        self._cache_eig(self._map_blocks(solve, missing,
+                                         self._eigval_buffers(missing)).items())
+        if len(compiled) > 0:
+            evals, evecs = _stevd_many([self.diag[block] for block in compiled],
+                                       [self.offdiag[block] for block in compiled],
+                                       compute_v=False)
+            self._cache_eig(zip(compiled, zip(evals, evecs)))
 
+        data_evals = dict()
+        for block in self.ensemble.keys():
+            data_evals[block] = self._eig_cache[block][0]
         return Array(self.ensemble, data_evals)
 
     def asarray(self):
@@ -151,13 +604,23 @@ class TriDiag:
         Returns:
             ensemble.Array:  2d ensemble.Array containing the matrices
         """
-        data_mats = OrderedDict()
-        for block, deg in self.ensemble:
-            l = len(self.diag[block])
-            if self.diag[block] is None:
-                data_mats[block] = np.empty((0,0))
-            else:
-                data_mats[block] = np.diag(self.diag[block]) + \
-                               np.diag(self.offdiag[block], k=1) + \
-                               np.diag(self.offdiag[block], k=-1)
+        # the matrices of all blocks with the same datatype are views of a
+        # single zero-initialized buffer
+        by_dtype = dict()
+        for block, d, e in self:
+            dtype = d.dtype if d.dtype == e.dtype else np.result_type(d, e)
+            by_dtype.setdefault(dtype, []).append((block, d, e))
+
+        data_mats = dict()
+        for dtype, entries in by_dtype.items():
+            flat = np.zeros(sum(len(d)**2 for block, d, e in entries), dtype=dtype)
+            start = 0
+            for block, d, e in entries:
+                n = len(d)
+                mat = flat[start:start+n*n]
+                mat[::n+1] = d
+                mat[1::n+1] = e
+                mat[n::n+1] = e
+                data_mats[block] = mat.reshape(n, n)
+                start += n * n
         return Array(self.ensemble, data_mats)
@@ -0,0 +1,163 @@
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
+
+#include <lapacke.h>
+
+#include <algorithm>
+#include <limits>
+#include <stdexcept>
+#include <vector>
+
+#define STRINGIFY(x) #x
+#define MACRO_STRINGIFY(x) STRINGIFY(x)
+
+namespace py = pybind11;
+
+using darray = py::array_t<double, py::array::c_style | py::array::forcecast>;
+using farray = py::array_t<double, py::array::f_style>;
+using iarray = py::array_t<lapack_int>;
+
+static void check_dimensions(std::vector<darray> const &diags,
+                             std::vector<darray> const &offdiags) {
+  if (diags.size() != offdiags.size())
+    throw std::invalid_argument("number of diagonals and off-diagonals differ");
+  for (size_t i = 0; i < diags.size(); ++i) {
+    py::ssize_t n = diags[i].size();
+    if ((n > 0) && (offdiags[i].size() != n - 1))
+      throw std::invalid_argument("off-diagonal needs one element less than diagonal");
+  }
+}
+
+py::tuple stevd_many(std::vector<darray> const &diags,
+                     std::vector<darray> const &offdiags, bool compute_v) {
+  check_dimensions(diags, offdiags);
+  size_t n_mats = diags.size();
+
+  // allocate all outputs while holding the GIL
+  py::list evals;
+  py::list evecs;
+  std::vector<lapack_int> dims(n_mats);
+  std::vector<double *> w_ptrs(n_mats);
+  std::vector<double *> z_ptrs(n_mats, nullptr);
+  std::vector<std::vector<double>> e_copies(n_mats);
+  iarray infos(n_mats);
+  lapack_int *info_ptr = infos.mutable_data();
+
+  for (size_t i = 0; i < n_mats; ++i) {
+    py::ssize_t n = diags[i].size();
+    dims[i] = (lapack_int)n;
+
+    darray w(n);
+    std::copy_n(diags[i].data(), n, w.mutable_data());
+    w_ptrs[i] = w.mutable_data();
+    evals.append(w);
+
+    e_copies[i].assign(std::max<py::ssize_t>(n, 1), 0.);
+    std::copy_n(offdiags[i].data(), std::max<py::ssize_t>(n - 1, 0),
+                e_copies[i].data());
+
+    if (compute_v) {
+      farray z({n, n});
+      z_ptrs[i] = z.mutable_data();
+      evecs.append(z);
+    }
+  }
+
+  {
+    py::gil_scoped_release release;
+    for (size_t i = 0; i < n_mats; ++i) {
+      lapack_int n = dims[i];
+      if (n == 0) {
+        info_ptr[i] = 0;
+        continue;
+      }
+      info_ptr[i] = LAPACKE_dstevd(LAPACK_COL_MAJOR, compute_v ? 'V' : 'N', n,
+                                   w_ptrs[i], e_copies[i].data(), z_ptrs[i],
+                                   std::max<lapack_int>(n, 1));
+    }
+  }
+
+  if (compute_v)
+    return py::make_tuple(evals, evecs, infos);
+  else
+    return py::make_tuple(evals, py::none(), infos);
+}
+
+py::tuple stebz_smallest_many(std::vector<darray> const &diags,
+                              std::vector<darray> const &offdiags) {
+  check_dimensions(diags, offdiags);
+  size_t n_mats = diags.size();
+
+  std::vector<lapack_int> dims(n_mats);
+  std::vector<double const *> d_ptrs(n_mats);
+  std::vector<double const *> e_ptrs(n_mats);
+  lapack_int max_dim = 1;
+  for (size_t i = 0; i < n_mats; ++i) {
+    dims[i] = (lapack_int)diags[i].size();
+    d_ptrs[i] = diags[i].data();
+    e_ptrs[i] = offdiags[i].data();
+    max_dim = std::max(max_dim, dims[i]);
+  }
+
+  darray e0(n_mats);
+  double *e0_ptr = e0.mutable_data();
+  iarray infos(n_mats);
+  lapack_int *info_ptr = infos.mutable_data();
+
+  {
+    py::gil_scoped_release release;
+
+    // workspace is shared by all matrices
+    std::vector<double> w(max_dim);
+    std::vector<lapack_int> iblock(max_dim);
+    std::vector<lapack_int> isplit(max_dim);
+    for (size_t i = 0; i < n_mats; ++i) {
+      lapack_int n = dims[i];
+      if (n == 0) {
+        e0_ptr[i] = std::numeric_limits<double>::quiet_NaN();
+        info_ptr[i] = 0;
+        continue;
+      }
+      lapack_int m, nsplit;
+      info_ptr[i] = LAPACKE_dstebz('I', 'E', n, 0., 0., 1, 1, 0., d_ptrs[i],
+                                   e_ptrs[i], &m, &nsplit, w.data(),
+                                   iblock.data(), isplit.data());
+      e0_ptr[i] = w[0];
+    }
+  }
+  return py::make_tuple(e0, infos);
+}
+
+PYBIND11_MODULE(tridiag_wrapper, m) {
+  m.doc() = R"pbdoc(
+        Eigensolvers for many symmetric tridiagonal matrices
+        ----------------------------------------------------
+        Calls LAPACKE for all matrices in a single loop without the GIL
+        .. currentmodule:: tridiag_wrapper
+        .. autosummary::
+           :toctree: _generate
+           stevd_many
+           stebz_smallest_many
+    )pbdoc";
+
+  m.def("stevd_many", &stevd_many, py::arg("diags"), py::arg("offdiags"),
+        py::arg("compute_v") = true, R"pbdoc(
+        Eigen decomposition of symmetric tridiagonal matrices by dstevd
+        Returns the list of eigenvalues, the list of eigenvectors as columns
+        (None if not compute_v) and the LAPACK info of every matrix.
+    )pbdoc");
+
+  m.def("stebz_smallest_many", &stebz_smallest_many, py::arg("diags"),
+        py::arg("offdiags"), R"pbdoc(
+        Smallest eigenvalue of symmetric tridiagonal matrices by dstebz
+        Returns the array of smallest eigenvalues (nan for empty matrices)
+        and the LAPACK info of every matrix.
+    )pbdoc");
+
+#ifdef VERSION_INFO
+  m.attr("__version__") = MACRO_STRINGIFY(VERSION_INFO);
+#else
+  m.attr("__version__") = "dev";
+#endif
+}
@@ -26,6 +26,13 @@ ext_modules = [
         define_macros = [('VERSION_INFO', __version__)],
         extra_objects=["-lhydra -L" + os.path.join(hydra_dir, "lib/libhydra.a")]
     ),
+    Pybind11Extension("tridiag_wrapper",
+        ["pydiag/tridiag_wrapper/tridiag_wrapper.cpp"],
+        define_macros = [('VERSION_INFO', __version__)],
+        libraries=["lapacke", "lapack"],
+        # tridiag.py falls back to scipy if LAPACKE is not available
+        optional=True
+    ),
 ]
 
 setup(
@@ -0,0 +1,70 @@
+import numpy as np
+
+import pydiag.ensemble as pe
+
+
+def _array():
+    ensemble = pe.Ensemble(["a", "b", "c"])
+    data = {("a",): np.ones((2, 2)),
+            ("b",): np.zeros((2, 2)),
+            ("c",): np.ones((3, 3))}
+    return pe.Array(ensemble, data)
+
+
+def test_inplace_change_after_grouping():
+    A = _array()
+    pe.expm(A)
+    A.array[("a",)][:] = 5
+    np.testing.assert_array_equal((A + 1).array[("a",)], 6)
+    np.testing.assert_array_equal(pe.expm(A).array[("a",)],
+                                  pe.expm(_array() * 5).array[("a",)])
+
+
+def test_replaced_block_after_grouping():
+    A = _array()
+    B = pe.expm(A)
+    A.array[("b",)] = np.full((2, 2), 7.)
+    B.array[("a",)] = np.zeros((2, 2))
+    np.testing.assert_array_equal((A + 1).array[("b",)], 8)
+    np.testing.assert_array_equal((-A).array[("b",)], -7)
+    np.testing.assert_array_equal((A * B).array[("a",)], 0)
+    np.testing.assert_array_equal((-B).array[("a",)], 0)
+
+
+def test_reduce_does_not_cache():
+    A = _array()
+    assert A.min().scalar == {("a",): 1., ("b",): 0., ("c",): 1.}
+    assert A._groups is None
+    A.array[("a",)][:] = 5
+    np.testing.assert_array_equal((A + 1).array[("a",)], 6)
+    assert A.max().scalar == {("a",): 5., ("b",): 0., ("c",): 1.}
+
+
+def test_flatten_after_grouping():
+    A = _array()
+    B = pe.expm(A)
+    B.array[("c",)] = np.full((3, 3), 2.)
+    np.testing.assert_array_equal(B.flatten().array[("c",)], np.full(9, 2.))
+    np.testing.assert_allclose(B.flatten().array[("a",)], B.array[("a",)].ravel())
+
+
+def test_expm_does_not_modify_input():
+    A = _array()
+    arrays = dict(A.array)
+    pe.expm(A)
+    assert all(A.array[block] is arr for block, arr in arrays.items())
+    assert A._groups is None
+
+
+def test_scalar_operand_dtype_after_grouping():
+    ensemble = pe.Ensemble(["a", "b"])
+    data = {("a",): np.eye(2, dtype=np.float32), ("b",): np.eye(2, dtype=np.float32)}
+    S = pe.Scalar(ensemble, {("a",): 2., ("b",): 3.})
+    A = pe.Array(ensemble, data)
+    B = pe.expm(A)
+    C = pe.Array(ensemble, dict(B.array))
+    assert B._groups is not None and C._groups is None
+    for block in ensemble.blocks:
+        assert (B * S).array[block].dtype == (C * S).array[block].dtype == np.float32
+    assert (B * pe.Scalar(ensemble, {("a",): 2j, ("b",): 3j})).array[("a",)].dtype \
+        == (C * pe.Scalar(ensemble, {("a",): 2j, ("b",): 3j})).array[("a",)].dtype
@@ -0,0 +1,94 @@
+import h5py
+import numpy as np
+import pytest
+
+import pydiag
+
+
+def _complex_dtype(ftype, rname="real", iname="imag"):
+    return np.dtype([(rname, ftype), (iname, ftype)])
+
+
+def _compound(values, dtype):
+    raw = np.empty(values.shape, dtype=dtype)
+    raw[dtype.names[0]] = values.real
+    raw[dtype.names[1]] = values.imag
+    return raw
+
+
+@pytest.fixture
+def h5file(tmp_path):
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal((3, 4)) + 1j * rng.standard_normal((3, 4))
+    filename = str(tmp_path / "data.h5")
+    with h5py.File(filename, "w") as fl:
+        fl["real"] = np.arange(6.).reshape(2, 3)
+        fl["scalar"] = 2.5
+        fl["empty"] = np.empty((0, 3))
+        fl["complex"] = _compound(values, _complex_dtype("<f8"))
+        fl["complex_ri"] = _compound(values, _complex_dtype("<f8", "r", "i"))
+        fl["complex_single"] = _compound(values, _complex_dtype("<f4"))
+        fl["complex_big_endian"] = _compound(values, _complex_dtype(">f8"))
+        fl["complex_empty"] = np.empty((0,), dtype=_complex_dtype("<f8"))
+        fl["complex_scalar"] = _compound(np.array(1. - 2j), _complex_dtype("<f8"))
+        fl["group/nested"] = np.arange(3)
+    return filename, values
+
+
+def test_read_plain(h5file):
+    filename, _ = h5file
+    data = pydiag.read_h5_file(filename)
+    assert list(data) == sorted(data)
+    np.testing.assert_array_equal(data["real"], np.arange(6.).reshape(2, 3))
+    np.testing.assert_array_equal(data["group/nested"], np.arange(3))
+    assert data["scalar"].shape == () and data["scalar"] == 2.5
+
+
+def test_read_complex(h5file):
+    filename, values = h5file
+    data = pydiag.read_h5_file(filename)
+    for tag in ["complex", "complex_ri", "complex_big_endian"]:
+        assert data[tag].dtype == np.complex128
+        np.testing.assert_array_equal(data[tag], values)
+    assert data["complex_single"].dtype == np.complex64
+    np.testing.assert_array_equal(data["complex_single"], values.astype(np.complex64))
+    assert data["complex_scalar"].shape == () and data["complex_scalar"] == 1. - 2j
+
+
+@pytest.mark.parametrize("tags", [None, ["empty", "complex_empty"]])
+def test_read_empty(h5file, tags):
+    filename, _ = h5file
+    data = pydiag.read_h5_file(filename, tags=tags)
+    assert data["empty"].shape == (0, 3) and data["empty"].dtype == np.float64
+    assert data["complex_empty"].shape == (0,)
+    assert data["complex_empty"].dtype == np.complex128
+
+
+def test_read_tags(h5file):
+    filename, values = h5file
+    data = pydiag.read_h5_file(filename, tags=["complex", "scalar"])
+    assert list(data) == ["complex", "scalar"]
+    np.testing.assert_array_equal(data["complex"], values)
+    with pytest.raises(ValueError):
+        pydiag.read_h5_file(filename, tags=["group"])
+    with pytest.raises(TypeError):
+        pydiag.read_h5_file(filename, tags=[1])
+
+
+def test_malformed_complex(tmp_path):
+    filename = str(tmp_path / "malformed.h5")
+    with h5py.File(filename, "w") as fl:
+        fl["names"] = np.zeros(2, dtype=_complex_dtype("<f8", "a", "b"))
+        fl["types"] = np.zeros(2, dtype=[("real", "<f8"), ("imag", "<f4")])
+    for tag in ["names", "types"]:
+        with pytest.raises(TypeError):
+            pydiag.read_h5_file(filename, tags=[tag])
+
+
+def test_read_h5_data(tmp_path):
+    for n in range(3):
+        with h5py.File(str(tmp_path / "run.n.{}.h5".format(n)), "w") as fl:
+            fl["n"] = n
+    data = pydiag.read_h5_data(str(tmp_path), r"run\.n\.(\d)\.h5", max_workers=2)
+    assert list(data) == [("0",), ("1",), ("2",)]
+    assert [d["n"] for d in data.values()] == [0, 1, 2]
@@ -0,0 +1,31 @@
+import pickle
+
+import pytest
+
+import pydiag.ensemble as pe
+
+
+def test_duplicate_blocks():
+    ensemble = pe.Ensemble(["a", "a", "b"], [("x", 2)])
+    assert list(ensemble.keys()) == [block for block, deg in ensemble]
+    assert ensemble.blocks_tuple == (("a", "x"), ("b", "x"))
+    assert dict(list(ensemble)) == {("a", "x"): 2, ("b", "x"): 2}
+
+
+def test_immutable():
+    ensemble = pe.Ensemble(["a", "b"], [("x", 2)])
+    other = pe.Ensemble(["a", "b"], [("x", 2)])
+    with pytest.raises(TypeError):
+        ensemble.degeneracy[("c", "x")] = 1
+    with pytest.raises(AttributeError):
+        ensemble.blocks.append(("c", "x"))
+    assert ensemble == other and hash(ensemble) == hash(other)
+
+
+def test_pickle():
+    ensemble = pe.Ensemble(["a", "b"], [("x", 2)])
+    copy = pickle.loads(pickle.dumps(ensemble))
+    assert copy == ensemble and hash(copy) == hash(ensemble)
+    assert dict(copy.degeneracy) == dict(ensemble.degeneracy)
+    with pytest.raises(TypeError):
+        copy.degeneracy[("c", "x")] = 1
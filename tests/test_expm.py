@@ -0,0 +1,80 @@
+import numpy as np
+import scipy.linalg
+import pytest
+
+import pydiag.ensemble as pe
+
+
+def _array(mats):
+    ensemble = pe.Ensemble([str(i) for i in range(len(mats))])
+    data = dict((block, mat) for block, mat in zip(ensemble.blocks, mats))
+    return pe.Array(ensemble, data)
+
+
+def _check(mats, rtol=1e-12):
+    A = _array(mats)
+    R = pe.expm(A)
+    for block, mat in zip(A.ensemble.blocks, mats):
+        expected = scipy.linalg.expm(mat)
+        assert R.array[block].dtype == expected.dtype
+        np.testing.assert_allclose(R.array[block], expected, rtol=rtol,
+                                   atol=rtol * np.abs(expected).max())
+
+
+def test_expm_normal():
+    rng = np.random.default_rng(1)
+    mats = []
+    for scale in [1e-3, 0.1, 1., 10., 30.]:
+        M = rng.standard_normal((5, 5))
+        mats.append(scale * (M + M.T))
+    _check(mats, rtol=1e-10)
+
+
+def test_expm_nilpotent():
+    mats = [np.array([[0., x], [0., 0.]]) for x in [1., 1e10, 1e50]]
+    _check(mats)
+    R = pe.expm(_array(mats))
+    np.testing.assert_allclose(R.array[("2",)], [[1., 1e50], [0., 1.]], rtol=1e-14)
+
+
+def test_expm_triangular():
+    rng = np.random.default_rng(2)
+    mats = []
+    for scale in [1., 1e6, 1e8]:
+        diag = np.diag(rng.random(4))
+        mats.append(np.triu(rng.random((4, 4)), 1) * scale + diag)
+        mats.append(np.tril(rng.random((4, 4)), -1) * scale + diag)
+    _check(mats, rtol=1e-10)
+
+
+def test_expm_large_norm_mixed():
+    rng = np.random.default_rng(3)
+    mats = [rng.standard_normal((3, 3)) * scale for scale in [0.01, 1., 20.]]
+    # non-normal with large norm but moderate eigenvalues
+    S = np.array([[1., 1e6, 0.], [0., 1., 1e6], [0., 0., 1.]])
+    mats.append(S @ np.diag([1., -2., 0.5]) @ np.linalg.inv(S))
+    _check(mats, rtol=1e-8)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.complex64])
+@pytest.mark.parametrize("scale", [0.1, 10.])
+def test_expm_single_precision(dtype, scale):
+    rng = np.random.default_rng(4)
+    mats = [(rng.standard_normal((4, 4)) * scale).astype(dtype) for _ in range(3)]
+    _check(mats, rtol=1e-4)
+
+
+def test_expm_mixed_structure():
+    rng = np.random.default_rng(5)
+    mats = [np.diag(rng.standard_normal(3)),
+            np.triu(rng.standard_normal((3, 3))),
+            np.tril(rng.standard_normal((3, 3))) * 1e4 * (1 - np.eye(3)),
+            rng.standard_normal((3, 3)),
+            np.zeros((3, 3))]
+    _check(mats, rtol=1e-10)
+
+
+def test_expm_large_blocks():
+    rng = np.random.default_rng(3)
+    _check([rng.standard_normal((n, n)) / n for n in [8, 12, 13, 24, 24]],
+           rtol=1e-10)
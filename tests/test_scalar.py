@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import pydiag.ensemble as pe
+
+
+def _scalar(*values):
+    ensemble = pe.Ensemble([str(i) for i in range(len(values))])
+    return pe.Scalar(ensemble, dict(zip(ensemble.blocks, values)))
+
+
+def test_non_float_values():
+    S = _scalar("x", "y")
+    assert (S + "z").scalar == {("0",): "xz", ("1",): "yz"}
+    assert S.min() == "x"
+
+    obj = object()
+    assert _scalar(obj, None).scalar == {("0",): obj, ("1",): None}
+
+
+def test_large_integers():
+    S = _scalar(2**70, 3)
+    assert (S + 1).scalar == {("0",): 2**70 + 1, ("1",): 4}
+    assert (-S).scalar == {("0",): -2**70, ("1",): -3}
+    assert (S * S).scalar == {("0",): 2**140, ("1",): 9}
+    assert S.max() == 2**70
+
+
+def test_none_and_nan():
+    S = _scalar(1., None, np.nan)
+    with pytest.raises(TypeError):
+        S + 1
+    with pytest.raises(TypeError):
+        -S
+
+    T = _scalar(1., 2., np.nan)
+    R = T + 1
+    assert R.scalar[("0",)] == 2. and np.isnan(R.scalar[("2",)])
+    assert T.min() == min([1., 2., np.nan])
+    assert np.isnan(_scalar(np.nan, 1.).max())
+    assert _scalar(3., None, 2.).min() == 2.
+    assert _scalar(3., None, 2.).max() == 3.
+
+
+def test_division_by_zero():
+    S = _scalar(1., 2.)
+    with pytest.raises(ZeroDivisionError):
+        S / 0
+    with pytest.raises(ZeroDivisionError):
+        S / _scalar(1., 0.)
+    assert (S / 2).scalar == {("0",): 0.5, ("1",): 1.}
+
+
+def test_integers():
+    S = _scalar(3, 1, None)
+    assert S.min() == 1 and isinstance(S.min(), int)
+    assert (_scalar(3, 1) * 2).scalar == {("0",): 6, ("1",): 2}
+    assert isinstance((_scalar(3, 1) * 2).scalar[("0",)], int)
+
+
+def test_scalar_arithmetic():
+    S = _scalar(1., 2.)
+    T = _scalar(3., 5.)
+    assert (S + T).scalar == {("0",): 4., ("1",): 7.}
+    assert (S * T).scalar == {("0",): 3., ("1",): 10.}
+    assert (T - S).scalar == {("0",): 2., ("1",): 3.}
+    assert (T / S).scalar == {("0",): 3., ("1",): 2.5}
+    assert (-S).scalar == {("0",): -1., ("1",): -2.}
+    assert S.min() == 1. and S.max() == 2.
+
+
+def test_mixed_real_and_complex():
+    S = _scalar(1., 2j)
+    R = S + 1
+    assert R.scalar == {("0",): 2., ("1",): 1 + 2j}
+    assert isinstance(R.scalar[("0",)], float)
+    assert isinstance((-S).scalar[("0",)], float)
+    assert isinstance((S * 2).scalar[("0",)], float)
+
+    T = _scalar(np.float32(1.5), 2.)
+    assert isinstance((T + 1).scalar[("0",)], np.float32)
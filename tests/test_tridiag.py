@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+import pydiag.ensemble as pe
+import pydiag.ensemble.tridiag as td
+
+
+DIMS = [0, 1, 2, 3, 7, 40, 150]
+
+
+def _matrices():
+    rng = np.random.default_rng(1)
+    diags = [rng.standard_normal(n) for n in DIMS]
+    offdiags = [rng.standard_normal(max(n - 1, 0)) for n in DIMS]
+    return diags, offdiags
+
+
+def _dense(d, e):
+    return np.diag(d) + np.diag(e, 1) + np.diag(e, -1)
+
+
+def _tridiag():
+    diags, offdiags = _matrices()
+    ensemble = pe.Ensemble([str(n) for n in DIMS])
+    data = dict((block, {"diag": d, "offdiag": np.append(e, 0.)[:len(d)]})
+                for block, d, e in zip(ensemble.blocks, diags, offdiags))
+    return pe.TriDiag(ensemble, data)
+
+
+def test_eigensolvers():
+    T = _tridiag()
+    e0 = T.eig0()
+    evals, evecs = T.eig()
+    cached = T.eig0()
+    for block, val in e0.items():
+        assert (val is None and cached[block] is None) or np.isclose(val, cached[block])
+    for block, d, e in T:
+        if len(d) == 0:
+            assert e0[block] is None
+            continue
+        H = _dense(d, e)
+        expected = np.linalg.eigvalsh(H)
+        np.testing.assert_allclose(evals.array[block], expected, atol=1e-12)
+        np.testing.assert_allclose(T.eigvals().array[block], expected, atol=1e-12)
+        np.testing.assert_allclose(e0[block], expected[0], atol=1e-12)
+        np.testing.assert_allclose(H @ evecs.array[block],
+                                   evecs.array[block] * evals.array[block], atol=1e-10)
+
+
+def test_sturm_smallest_blocks():
+    diags, offdiags = _matrices()
+    diags, offdiags = diags[1:5], offdiags[1:5]
+    expected = [np.linalg.eigvalsh(_dense(d, e))[0] for d, e in zip(diags, offdiags)]
+    np.testing.assert_allclose(td._sturm_smallest_blocks(diags, offdiags),
+                               expected, atol=1e-12)
+
+
+@pytest.mark.skipif(td.tridiag_wrapper is None, reason="tridiag_wrapper not built")
+@pytest.mark.parametrize("compute_v", [True, False])
+def test_stevd_many(compute_v):
+    diags, offdiags = _matrices()
+    evals, evecs = td._stevd_many(diags, offdiags, compute_v=compute_v)
+    for d, e, w, z in zip(diags, offdiags, evals, evecs):
+        H = _dense(d, e)
+        np.testing.assert_allclose(w, np.linalg.eigvalsh(H), atol=1e-12)
+        if compute_v:
+            np.testing.assert_allclose(H @ z, z * w, atol=1e-10)
+        else:
+            assert z is None
+
+
+@pytest.mark.skipif(td.tridiag_wrapper is None, reason="tridiag_wrapper not built")
+def test_stebz_smallest_many():
+    diags, offdiags = _matrices()
+    e0 = td._stebz_smallest_many(diags, offdiags)
+    assert np.isnan(e0[0])
+    for d, e, w in zip(diags[1:], offdiags[1:], e0[1:]):
+        np.testing.assert_allclose(w, np.linalg.eigvalsh(_dense(d, e))[0], atol=1e-12)
+
+
+def test_data_is_copied():
+    ensemble = pe.Ensemble(["a"])
+    d = np.array([1., 2., 3.])
+    e = np.array([1., 1.])
+    T = pe.TriDiag(ensemble, {("a",): {"diag": d, "offdiag": e}})
+    expected = np.linalg.eigvalsh(_dense(d, e))
+    T.eigvals()
+    d[:] = 0.
+    e[:] = 0.
+    np.testing.assert_allclose(T.eigvals().array[("a",)], expected)
+    np.testing.assert_allclose(T.eig()[0].array[("a",)], expected)
+
+
+def test_cached_eigen_arrays_are_read_only():
+    T = _tridiag()
+    evals = T.eigvals()
+    with pytest.raises(ValueError):
+        evals.array[("3",)] -= 100
+    evals, evecs = T.eig()
+    with pytest.raises(ValueError):
+        evecs.array[("7",)][0, 0] = 0.
+    shifted = evals - 100
+    np.testing.assert_allclose(T.eigvals().array[("3",)] - 100, shifted.array[("3",)])
+    np.testing.assert_allclose(T.eig0().scalar[("3",)], T.eigvals().array[("3",)][0])
+
+
+@pytest.mark.parametrize("select_range", [(0, 0), (1, 2), (-3, 1), (2, 100), (5, 3)])
+def test_eig_select_indices(select_range):
+    T = _tridiag()
+    evals, evecs = T.eig(select='i', select_range=select_range)
+    for block, d, e in T:
+        n = len(d)
+        lo, hi = max(select_range[0], 0), min(select_range[1], n - 1)
+        k = max(hi - lo + 1, 0)
+        assert evals.array[block].shape == (k,)
+        assert evecs.array[block].shape == (n, k)
+        if k > 0:
+            expected = np.linalg.eigvalsh(_dense(d, e))[lo:hi+1]
+            np.testing.assert_allclose(evals.array[block], expected, atol=1e-10)
+            np.testing.assert_allclose(_dense(d, e) @ evecs.array[block],
+                                       evecs.array[block] * evals.array[block],
+                                       atol=1e-8)
+
+
+@pytest.mark.parametrize("select_range", [(-1., 1.), (-100., 100.), (50., 60.), (1., -1.)])
+def test_eig_select_values(select_range):
+    T = _tridiag()
+    evals, evecs = T.eig(select='v', select_range=select_range)
+    for block, d, e in T:
+        n = len(d)
+        expected = np.linalg.eigvalsh(_dense(d, e)) if n > 0 else np.empty(0)
+        expected = expected[(expected > select_range[0]) & (expected <= select_range[1])]
+        assert evals.array[block].shape == expected.shape
+        assert evecs.array[block].shape == (n, len(expected))
+        np.testing.assert_allclose(evals.array[block], expected, atol=1e-10)
+        if len(expected) > 0:
+            np.testing.assert_allclose(_dense(d, e) @ evecs.array[block],
+                                       evecs.array[block] * evals.array[block],
+                                       atol=1e-8)
+
+
+def test_eig_select_invalid():
+    T = _tridiag()
+    with pytest.raises(ValueError):
+        T.eig(select='x', select_range=(0, 1))
+    with pytest.raises(ValueError):
+        T.eig(select='i')